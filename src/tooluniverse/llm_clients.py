@@ -1,14 +1,75 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
+import asyncio
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from typing import Any, Dict, List, Optional, Tuple
+import functools
+import operator
 import os
+import random
+import re
 import time
 import json as _json
+import threading
+
+# Output-token limits probed (ascending) when a model rejects the request
+# without an explicit max_tokens and does not advertise its own limit.
+_FALLBACK_LIMITS = (32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+_TOKEN_LIMIT_RE = re.compile(r"(\d+)\s*(?:tokens?|completion)")
+
+
+def _prompt_length_bucket(messages: List[Dict[str, Any]]) -> int:
+    """Power-of-two bucket of the prompt's character length."""
+    return sum(len(str(m.get("content") or "")) for m in messages).bit_length()
+
+
+# Roles whose turns are flattened into a Gemini prompt.
+_GEMINI_PROMPT_ROLES = frozenset({"user", "system"})
+
+_SHARED_HTTP_CLIENT = None
+_SHARED_HTTP_CLIENT_LOCK = threading.Lock()
+
+
+def _get_shared_http_client():
+    """Return the pooled httpx client shared by the hosted-provider clients.
+
+    Built on first use so importing this module does not pull in httpx for
+    callers that never create an Azure/OpenRouter client. HTTP/2 is used when
+    the optional h2 package is installed (pip install "httpx[http2]").
+    """
+    global _SHARED_HTTP_CLIENT
+    if _SHARED_HTTP_CLIENT is None:
+        with _SHARED_HTTP_CLIENT_LOCK:
+            if _SHARED_HTTP_CLIENT is None:
+                import httpx
+
+                _SHARED_HTTP_CLIENT = httpx.Client(
+                    http2=find_spec("h2") is not None,
+                    limits=httpx.Limits(
+                        max_connections=200,
+                        max_keepalive_connections=100,
+                        keepalive_expiry=30.0,
+                    ),
+                    timeout=httpx.Timeout(600.0, connect=5.0),
+                    follow_redirects=True,
+                )
+    return _SHARED_HTTP_CLIENT
 
 
 class BaseLLMClient:
+    # Clients are created per model/tool; keep instances dict-free.
+    __slots__ = ()
+
     def test_api(self) -> None:
         raise NotImplementedError
 
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _render_messages_prefix(prefix: Tuple[Tuple[str, str], ...]) -> str:
+        """Render a stable leading run of messages once per distinct prefix."""
+        return "".join(f"{content}\n" for _, content in prefix)
+
     def infer(
         self,
         messages: List[Dict[str, str]],
@@ -44,8 +105,42 @@ class BaseLLMClient:
         if result is not None:
             yield result
 
+    def infer_batch(
+        self,
+        messages_list: List[List[Dict[str, str]]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        return_json: bool,
+        custom_format: Any = None,
+        max_retries: int = 5,
+        retry_delay: int = 5,
+    ) -> List[Optional[str]]:
+        """Default batch implementation runs each conversation sequentially."""
+        return [
+            self.infer(
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                return_json=return_json,
+                custom_format=custom_format,
+                max_retries=max_retries,
+                retry_delay=retry_delay,
+            )
+            for messages in messages_list
+        ]
+
 
 class AzureOpenAIClient(BaseLLMClient):
+    __slots__ = (
+        "_AzureOpenAI",
+        "_openai",
+        "model_name",
+        "logger",
+        "client",
+        "api_version",
+        "_default_limits",
+    )
+
     # Built-in defaults for model families (can be overridden by env)
     DEFAULT_MODEL_LIMITS: Dict[str, Dict[str, int]] = {
         # GPT-4.1 series
@@ -67,6 +162,10 @@ class AzureOpenAIClient(BaseLLMClient):
         "text-embedding-3-small": {"max_output": 8192, "context_window": 8192},
         "text-embedding-3-large": {"max_output": 8192, "context_window": 8192},
     }
+    # (model, prompt length bucket) -> output-token limit that last succeeded
+    # after a fallback probe; a limit forced by a long prompt is not reused
+    # for shorter ones
+    _FALLBACK_LIMIT_CACHE: Dict[Tuple[str, int], int] = {}
 
     def __init__(self, model_id: str, api_version: Optional[str], logger):
         try:
@@ -82,7 +181,7 @@ class AzureOpenAIClient(BaseLLMClient):
 
         resolved_version = api_version or self._resolve_api_version(model_id)
         self.logger.debug(
-            f"Resolved Azure API version for {model_id}: {resolved_version}"
+            "Resolved Azure API version for %s: %s", model_id, resolved_version
         )
 
         api_key = os.getenv("AZURE_OPENAI_API_KEY")
@@ -90,7 +189,10 @@ class AzureOpenAIClient(BaseLLMClient):
             raise ValueError("AZURE_OPENAI_API_KEY not set")
         endpoint = os.getenv("AZURE_OPENAI_ENDPOINT", "https://azure-ai.hms.edu")
         self.client = self._AzureOpenAI(
-            azure_endpoint=endpoint, api_key=api_key, api_version=resolved_version
+            azure_endpoint=endpoint,
+            api_key=api_key,
+            api_version=resolved_version,
+            http_client=_get_shared_http_client(),
         )
         self.api_version = resolved_version
 
@@ -181,11 +283,46 @@ class AzureOpenAIClient(BaseLLMClient):
         ):
             if temperature is not None:
                 self.logger.warning(
-                    f"Model {model_id} does not support 'temperature'; ignoring provided value."
+                    "Model %s does not support 'temperature'; ignoring provided value.",
+                    model_id,
                 )
             return None
         return temperature
 
+    def _fallback_limit_candidates(self, error_msg: str) -> List[int]:
+        # Try the limit the provider advertises first, then only the
+        # fallback limits below it (or below the largest one otherwise).
+        advertised = [
+            int(n)
+            for n in _TOKEN_LIMIT_RE.findall(error_msg)
+            if 0 < int(n) <= _FALLBACK_LIMITS[-1]
+        ]
+        ceiling = min(advertised) if advertised else _FALLBACK_LIMITS[-1]
+        candidates = [ceiling] if advertised else []
+        start = bisect_right(_FALLBACK_LIMITS, ceiling)
+        candidates.extend(
+            lim for lim in reversed(_FALLBACK_LIMITS[:start]) if lim != ceiling
+        )
+        return candidates
+
+    def _call_with_fallback_limits(
+        self, call_fn, kwargs: Dict[str, Any], error: Exception, error_msg: str
+    ):
+        last_exc: Optional[Exception] = error
+        for lim in self._fallback_limit_candidates(error_msg):
+            try:
+                try:
+                    resp = call_fn(max_completion_tokens=lim, **kwargs)
+                except Exception:  # noqa: BLE001
+                    resp = call_fn(max_tokens=lim, **kwargs)
+            except Exception as inner:  # noqa: BLE001
+                last_exc = inner
+                continue
+            key = (self.model_name, _prompt_length_bucket(kwargs["messages"]))
+            self._FALLBACK_LIMIT_CACHE[key] = lim
+            return resp
+        raise last_exc
+
     # --------- public API ---------
     def test_api(self) -> None:
         test_messages = [{"role": "user", "content": "ping"}]
@@ -249,6 +386,10 @@ class AzureOpenAIClient(BaseLLMClient):
             if max_tokens is not None
             else self._resolve_default_max_tokens(self.model_name)
         )
+        if eff_max is None:
+            eff_max = self._FALLBACK_LIMIT_CACHE.get(
+                (self.model_name, _prompt_length_bucket(messages))
+            )
         while retries < max_retries:
             try:
                 kwargs: Dict[str, Any] = {
@@ -269,17 +410,6 @@ class AzureOpenAIClient(BaseLLMClient):
                         resp = call_fn(max_completion_tokens=eff_max, **kwargs)
                     else:
                         be_msg = str(be).lower()
-                        fallback_limits = [
-                            8192,
-                            4096,
-                            2048,
-                            1024,
-                            512,
-                            256,
-                            128,
-                            64,
-                            32,
-                        ]
                         if any(
                             k in be_msg
                             for k in [
@@ -289,25 +419,9 @@ class AzureOpenAIClient(BaseLLMClient):
                                 "max_completion_tokens",
                             ]
                         ):
-                            last_exc: Optional[Exception] = be
-                            for lim in fallback_limits:
-                                try:
-                                    try:
-                                        resp = call_fn(
-                                            max_completion_tokens=lim, **kwargs
-                                        )
-                                        last_exc = None
-                                        break
-                                    except Exception as inner_e:  # noqa: BLE001
-                                        last_exc = inner_e
-                                        resp = call_fn(max_tokens=lim, **kwargs)
-                                        last_exc = None
-                                        break
-                                except Exception as inner2:  # noqa: BLE001
-                                    last_exc = inner2
-                                    continue
-                            if last_exc is not None:
-                                raise last_exc
+                            resp = self._call_with_fallback_limits(
+                                call_fn, kwargs, be, be_msg
+                            )
                         else:
                             raise be
                 if custom_format is not None:
@@ -315,15 +429,12 @@ class AzureOpenAIClient(BaseLLMClient):
                 return resp.choices[0].message.content
             except self._openai.RateLimitError:  # type: ignore[attr-defined]
                 self.logger.warning(
-                    f"Rate limit exceeded. Retrying in {retry_delay} seconds..."
+                    "Rate limit exceeded. Retrying in %s seconds...", retry_delay
                 )
                 retries += 1
                 time.sleep(retry_delay * retries)
             except Exception as e:  # noqa: BLE001
-                self.logger.error(f"An error occurred: {e}")
-                import traceback
-
-                traceback.print_exc()
+                self.logger.error("An error occurred: %s", e, exc_info=True)
                 break
         self.logger.error("Max retries exceeded. Unable to complete the request.")
         return None
@@ -357,6 +468,7 @@ class AzureOpenAIClient(BaseLLMClient):
             if max_tokens is not None
             else self._resolve_default_max_tokens(self.model_name)
         )
+        _get_choices = operator.attrgetter("choices")
 
         while retries < max_retries:
             try:
@@ -372,18 +484,24 @@ class AzureOpenAIClient(BaseLLMClient):
 
                 stream = self.client.chat.completions.create(**kwargs)
                 for chunk in stream:
-                    text = self._extract_text_from_chunk(chunk)
+                    # Azure may send choice-less chunks (e.g. filter results)
+                    choices = _get_choices(chunk)
+                    if not choices:
+                        continue
+                    delta = choices[0].delta
+                    text = delta.content if delta else None
                     if text:
                         yield text
                 return
             except self._openai.RateLimitError:  # type: ignore[attr-defined]
                 self.logger.warning(
-                    f"Rate limit exceeded. Retrying in {retry_delay} seconds (streaming)..."
+                    "Rate limit exceeded. Retrying in %s seconds (streaming)...",
+                    retry_delay,
                 )
                 retries += 1
                 time.sleep(retry_delay * retries)
             except Exception as e:  # noqa: BLE001
-                self.logger.error(f"Streaming error: {e}")
+                self.logger.error("Streaming error: %s", e)
                 break
 
         # Fallback to non-streaming if streaming fails
@@ -399,6 +517,8 @@ class AzureOpenAIClient(BaseLLMClient):
 
 
 class GeminiClient(BaseLLMClient):
+    __slots__ = ("_genai", "model_name", "logger")
+
     def __init__(self, model_name: str, logger):
         try:
             import google.generativeai as genai  # type: ignore
@@ -415,6 +535,26 @@ class GeminiClient(BaseLLMClient):
     def _build_model(self):
         return self._genai.GenerativeModel(self.model_name)
 
+    def _messages_to_contents(self, messages: List[Dict[str, str]]) -> str:
+        # The system head is usually identical across calls; render it once.
+        # Only plain-text messages join the cached head: other content, such
+        # as multimodal parts, is unhashable and is rendered uncached below.
+        head = 0
+        while (
+            head < len(messages)
+            and messages[head]["role"] == "system"
+            and isinstance(messages[head]["content"], str)
+        ):
+            head += 1
+        prefix = self._render_messages_prefix(
+            tuple((m["role"], m["content"]) for m in messages[:head])
+        )
+        return prefix + "".join(
+            f"{m['content']}\n"
+            for m in messages[head:]
+            if m["role"] in _GEMINI_PROMPT_ROLES
+        )
+
     def test_api(self) -> None:
         model = self._build_model()
         model.generate_content(
@@ -437,10 +577,7 @@ class GeminiClient(BaseLLMClient):
     ) -> Optional[str]:
         if return_json:
             raise ValueError("Gemini JSON mode not supported here")
-        contents = ""
-        for m in messages:
-            if m["role"] in ("user", "system"):
-                contents += f"{m['content']}\n"
+        contents = self._messages_to_contents(messages)
         retries = 0
         while retries < max_retries:
             try:
@@ -455,7 +592,7 @@ class GeminiClient(BaseLLMClient):
                     0
                 ].get("content")
             except Exception as e:  # noqa: BLE001
-                self.logger.error(f"Gemini error: {e}")
+                self.logger.error("Gemini error: %s", e)
                 retries += 1
                 time.sleep(retry_delay * retries)
         return None
@@ -512,10 +649,7 @@ class GeminiClient(BaseLLMClient):
         if return_json:
             raise ValueError("Gemini JSON mode not supported here")
 
-        contents = ""
-        for m in messages:
-            if m["role"] in ("user", "system"):
-                contents += f"{m['content']}\n"
+        contents = self._messages_to_contents(messages)
 
         retries = 0
         while retries < max_retries:
@@ -536,7 +670,7 @@ class GeminiClient(BaseLLMClient):
                         yield text
                 return
             except Exception as e:  # noqa: BLE001
-                self.logger.error(f"Gemini streaming error: {e}")
+                self.logger.error("Gemini streaming error: %s", e)
                 retries += 1
                 time.sleep(retry_delay * retries)
 
@@ -557,6 +691,15 @@ class OpenRouterClient(BaseLLMClient):
     Supports models from OpenAI, Anthropic, Google, Qwen, and many other providers.
     """
 
+    __slots__ = (
+        "_OpenAI",
+        "_openai",
+        "model_name",
+        "logger",
+        "client",
+        "_default_limits",
+    )
+
     # Default model limits based on latest OpenRouter offerings
     DEFAULT_MODEL_LIMITS: Dict[str, Dict[str, int]] = {
         "openai/gpt-5": {"max_output": 128_000, "context_window": 400_000},
@@ -596,6 +739,7 @@ class OpenRouterClient(BaseLLMClient):
             base_url="https://openrouter.ai/api/v1",
             api_key=api_key,
             default_headers=default_headers if default_headers else None,
+            http_client=_get_shared_http_client(),
         )
 
         # Load env overrides for model limits
@@ -741,15 +885,12 @@ class OpenRouterClient(BaseLLMClient):
 
             except self._openai.RateLimitError:  # type: ignore[attr-defined]
                 self.logger.warning(
-                    f"Rate limit exceeded. Retrying in {retry_delay} seconds..."
+                    "Rate limit exceeded. Retrying in %s seconds...", retry_delay
                 )
                 retries += 1
                 time.sleep(retry_delay * retries)
             except Exception as e:  # noqa: BLE001
-                self.logger.error(f"OpenRouter error: {e}")
-                import traceback
-
-                traceback.print_exc()
+                self.logger.error("OpenRouter error: %s", e, exc_info=True)
                 break
 
         self.logger.error("Max retries exceeded. Unable to complete the request.")
@@ -757,7 +898,23 @@ class OpenRouterClient(BaseLLMClient):
 
 
 class VLLMClient(BaseLLMClient):
-    def __init__(self, model_name: str, server_url: str, logger):
+    __slots__ = ("model_name", "server_url", "logger", "client", "max_concurrency")
+
+    # Default upper bound on requests kept in flight by infer_batch; keep it
+    # at or below the server's --max-num-seqs.
+    MAX_BATCH_CONCURRENCY = 64
+    # Ceiling (seconds) on a single retry back-off before jitter
+    RETRY_DELAY_CAP = 60
+    # 4xx statuses that are still worth retrying (timeout, conflict, rate limit)
+    RETRYABLE_CLIENT_STATUSES = frozenset({408, 409, 429})
+
+    def __init__(
+        self,
+        model_name: str,
+        server_url: str,
+        logger,
+        max_concurrency: int = MAX_BATCH_CONCURRENCY,
+    ):
         try:
             from openai import OpenAI
         except Exception as e:
@@ -772,6 +929,7 @@ class VLLMClient(BaseLLMClient):
             server_url = server_url.rstrip("/") + "/v1"
         self.server_url = server_url
         self.logger = logger
+        self.max_concurrency = max(1, int(max_concurrency))
 
         self.client = OpenAI(
             api_key="EMPTY",
@@ -803,31 +961,197 @@ class VLLMClient(BaseLLMClient):
         if custom_format is not None:
             self.logger.warning("vLLM does not support custom format, ignoring")
 
+        kwargs = self._request_kwargs(temperature, max_tokens, return_json)
         retries = 0
         while retries < max_retries:
             try:
-                kwargs: Dict[str, Any] = {
-                    "model": self.model_name,
-                    "messages": messages,
-                }
+                resp = self.client.chat.completions.create(messages=messages, **kwargs)
+                return resp.choices[0].message.content
 
-                if temperature is not None:
-                    kwargs["temperature"] = temperature
+            except Exception as e:
+                self.logger.error("vLLM error: %s", e)
+                if not self._is_retryable(e):
+                    return None
+                retries += 1
+                if retries < max_retries:
+                    time.sleep(self._backoff(retry_delay, retries))
 
-                if max_tokens is not None:
-                    kwargs["max_tokens"] = max_tokens
+        self.logger.error("Max retries exceeded for vLLM request")
+        return None
 
-                if return_json:
-                    kwargs["response_format"] = {"type": "json_object"}
+    def infer_batch(
+        self,
+        messages_list: List[List[Dict[str, str]]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        return_json: bool,
+        custom_format: Any = None,
+        max_retries: int = 5,
+        retry_delay: int = 5,
+        dedup: bool = True,
+    ) -> List[Optional[str]]:
+        """Submit all conversations at once so the server can batch them.
+
+        vLLM only batches requests that are in flight together, so sending
+        them one by one gives no speedup. Results keep the input order.
+        With ``dedup`` and greedy decoding (temperature 0), identical
+        conversations are sent once and the answer is shared.
+        """
+        if not messages_list:
+            return []
+        if dedup and temperature == 0 and len(messages_list) > 1:
+            slots: Dict[str, int] = {}
+            unique: List[List[Dict[str, str]]] = []
+            positions: List[int] = []
+            for messages in messages_list:
+                key = _json.dumps(messages, sort_keys=True, default=str)
+                slot = slots.get(key)
+                if slot is None:
+                    slot = slots[key] = len(unique)
+                    unique.append(messages)
+                positions.append(slot)
+            if len(unique) < len(messages_list):
+                results = self.infer_batch(
+                    unique,
+                    temperature,
+                    max_tokens,
+                    return_json,
+                    custom_format,
+                    max_retries,
+                    retry_delay,
+                    dedup=False,
+                )
+                return [results[slot] for slot in positions]
+        if len(messages_list) == 1:
+            return super().infer_batch(
+                messages_list,
+                temperature,
+                max_tokens,
+                return_json,
+                custom_format,
+                max_retries,
+                retry_delay,
+            )
 
-                resp = self.client.chat.completions.create(**kwargs)
-                return resp.choices[0].message.content
+        if custom_format is not None:
+            self.logger.warning("vLLM does not support custom format, ignoring")
+
+        kwargs = self._request_kwargs(temperature, max_tokens, return_json)
+        return self._run_coroutine(
+            self._ainfer_batch(messages_list, kwargs, max_retries, retry_delay)
+        )
 
+    def _request_kwargs(
+        self,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        return_json: bool,
+    ) -> Dict[str, Any]:
+        """Build the per-call request options once, outside any retry loop."""
+        kwargs: Dict[str, Any] = {"model": self.model_name}
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        if max_tokens is not None:
+            kwargs["max_tokens"] = max_tokens
+        if return_json:
+            kwargs["response_format"] = {"type": "json_object"}
+        return kwargs
+
+    def _make_async_client(self):
+        from openai import AsyncOpenAI
+
+        return AsyncOpenAI(api_key="EMPTY", base_url=self.server_url)
+
+    async def _ainfer_batch(
+        self,
+        messages_list: List[List[Dict[str, str]]],
+        kwargs: Dict[str, Any],
+        max_retries: int,
+        retry_delay: int,
+    ) -> List[Optional[str]]:
+        # Start the longest conversations first so they do not end up as
+        # stragglers queued behind the semaphore.
+        order = list(range(len(messages_list)))
+        if len(order) > 8:
+            order.sort(key=lambda i: -self._conversation_length(messages_list[i]))
+
+        # The async client is bound to the running loop, so build it per batch.
+        aclient = self._make_async_client()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            done = await asyncio.gather(
+                *(
+                    self._ainfer_one(
+                        aclient,
+                        semaphore,
+                        messages_list[i],
+                        kwargs,
+                        max_retries,
+                        retry_delay,
+                    )
+                    for i in order
+                ),
+                return_exceptions=True,
+            )
+        finally:
+            await aclient.close()
+        results: List[Optional[str]] = [None] * len(messages_list)
+        for i, r in zip(order, done):
+            if not isinstance(r, BaseException):
+                results[i] = r
+        return results
+
+    @staticmethod
+    def _conversation_length(messages: List[Dict[str, str]]) -> int:
+        return sum(len(str(m.get("content") or "")) for m in messages)
+
+    async def _ainfer_one(
+        self,
+        aclient,
+        semaphore: asyncio.Semaphore,
+        messages: List[Dict[str, str]],
+        kwargs: Dict[str, Any],
+        max_retries: int,
+        retry_delay: int,
+    ) -> Optional[str]:
+        for attempt in range(max_retries):
+            try:
+                async with semaphore:
+                    resp = await aclient.chat.completions.create(
+                        messages=messages, **kwargs
+                    )
+                return resp.choices[0].message.content
             except Exception as e:
-                self.logger.error(f"vLLM error: {e}")
-                retries += 1
-                if retries < max_retries:
-                    time.sleep(retry_delay * retries)
+                self.logger.error("vLLM error: %s", e)
+                if not self._is_retryable(e):
+                    return None
+                if attempt + 1 < max_retries:
+                    await asyncio.sleep(self._backoff(retry_delay, attempt + 1))
 
         self.logger.error("Max retries exceeded for vLLM request")
         return None
+
+    @classmethod
+    def _is_retryable(cls, error: Exception) -> bool:
+        """Connection errors, timeouts and 5xx are retried; other 4xx are not."""
+        status = getattr(error, "status_code", None)
+        if not isinstance(status, int) or status >= 500:
+            return True
+        return status in cls.RETRYABLE_CLIENT_STATUSES
+
+    @classmethod
+    def _backoff(cls, retry_delay: float, attempt: int) -> float:
+        """Capped exponential delay with jitter so failing callers spread out."""
+        delay = min(cls.RETRY_DELAY_CAP, retry_delay * 2 ** (attempt - 1))
+        return delay * (0.5 + random.random())
+
+    @staticmethod
+    def _run_coroutine(coro):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        # Called from inside an event loop (e.g. an async MCP handler):
+        # run the batch on a private loop in a worker thread instead.
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, coro).result()
@@ -29,6 +29,11 @@ PROGRESS_LEVEL = 25  # Between INFO(20) and WARNING(30)
 logging.addLevelName(PROGRESS_LEVEL, "PROGRESS")
 
 
+def _is_tty(stream) -> bool:
+    isatty = getattr(stream, "isatty", None)
+    return bool(isatty and isatty())
+
+
 class ToolUniverseFormatter(logging.Formatter):
     """Custom formatter with colored output and emoji prefixes"""
 
@@ -53,18 +58,34 @@ class ToolUniverseFormatter(logging.Formatter):
         "CRITICAL": "🚨 ",
     }
 
+    def __init__(self, *args, use_color: Optional[bool] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Decide on color once instead of calling isatty() for every record
+        if use_color is None:
+            use_color = _is_tty(sys.stderr)
+        reset = self.COLORS["RESET"]
+        self._level_names = (
+            {
+                level: f"{color}{level}{reset}"
+                for level, color in self.COLORS.items()
+                if level != "RESET"
+            }
+            if use_color
+            else {}
+        )
+
     def format(self, record):
         # Add emoji prefix
-        emoji = self.EMOJI_PREFIX.get(record.levelname, "")
-
-        # Add color if output is to terminal
-        if hasattr(sys.stderr, "isatty") and sys.stderr.isatty():
-            color = self.COLORS.get(record.levelname, "")
-            reset = self.COLORS["RESET"]
-            record.levelname = f"{color}{record.levelname}{reset}"
+        levelname = record.levelname
+        emoji = self.EMOJI_PREFIX.get(levelname, "")
 
-        # Format the message
-        formatted = super().format(record)
+        # Add color if output is to terminal; restore the record afterwards
+        # so other handlers do not see the escape codes
+        record.levelname = self._level_names.get(levelname, levelname)
+        try:
+            formatted = super().format(record)
+        finally:
+            record.levelname = levelname
         return f"{emoji}{formatted}"
 
 
@@ -115,6 +136,7 @@ class ToolUniverseLogger:
         formatter = ToolUniverseFormatter(
             fmt="%(message)s",  # Simple format since we add emoji prefix
             datefmt="%H:%M:%S",
+            use_color=_is_tty(output_stream),
         )
         handler.setFormatter(formatter)
 
@@ -138,6 +160,7 @@ class ToolUniverseLogger:
         formatter = ToolUniverseFormatter(
             fmt="%(message)s",
             datefmt="%H:%M:%S",
+            use_color=_is_tty(sys.stderr),
         )
         handler.setFormatter(formatter)
 
@@ -7,13 +7,267 @@ Supports SMILES, InChI, molecule names, and various output formats.
 """
 
 import base64
+import functools
+import multiprocessing
+import os
 import requests
-import io
+import threading
 import warnings
-from typing import Any, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from importlib.util import find_spec
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from .visualization_tool import VisualizationTool
 from .tool_registry import register_tool
 
+_HAVE_RDKIT = find_spec("rdkit") is not None
+
+# Process pool used by Molecule2DTool.run_batch; created on first batch call.
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+# Keep-alive session for PubChem name lookups; retries are handled by urllib3.
+_PUBCHEM_SESSION = requests.Session()
+_PUBCHEM_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            raise_on_status=False,
+        ),
+    ),
+)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                # Spawned workers start clean instead of forking a process
+                # that may hold other threads' locks mid-operation
+                _POOL = ProcessPoolExecutor(
+                    max_workers=os.cpu_count(),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _POOL
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Forget a pool whose worker died so the next batch starts a new one."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+    pool.shutdown(wait=False)
+
+
+@functools.lru_cache(maxsize=None)
+def _rdkit() -> SimpleNamespace:
+    """Import the RDKit modules used by this tool once per process."""
+    if not _HAVE_RDKIT:
+        raise ImportError("rdkit is not installed")
+    # Suppress RDKit RuntimeWarnings about converter registration
+    with warnings.catch_warnings():
+        warnings.filterwarnings(
+            "ignore", category=RuntimeWarning, module="importlib._bootstrap"
+        )
+        from rdkit import Chem
+        from rdkit.Chem import Draw
+        from rdkit.Chem import rdDepictor
+        from rdkit.Chem import rdMolDescriptors
+        from rdkit.Chem.Draw import rdMolDraw2D
+
+    return SimpleNamespace(
+        Chem=Chem,
+        Draw=Draw,
+        rdDepictor=rdDepictor,
+        rdMolDescriptors=rdMolDescriptors,
+        rdMolDraw2D=rdMolDraw2D,
+    )
+
+
+class _InputError(ValueError):
+    """Raised when the tool arguments do not describe a usable molecule."""
+
+
+@functools.lru_cache(maxsize=4096)
+def _pubchem_smiles(name: str) -> str:
+    """Resolve a molecule name to SMILES using PubChem.
+
+    Failed lookups raise instead of returning None so they are not cached.
+    """
+    # Use PubChem PUG REST API
+    url = (
+        f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/"
+        f"{quote(name, safe='')}/property/IsomericSMILES/JSON"
+    )
+    response = _PUBCHEM_SESSION.get(url, timeout=10)
+    response.raise_for_status()
+    props = response.json()["PropertyTable"]["Properties"]
+    return props[0]["IsomericSMILES"]
+
+
+class _SmilesKeyedMol:
+    """Cache key that compares molecules by canonical SMILES.
+
+    The molecule rides along so a cache miss computes from the caller's
+    molecule rather than a re-parsed copy; it is dropped once used.
+    """
+
+    __slots__ = ("smiles", "mol")
+
+    def __init__(self, smiles: str, mol) -> None:
+        self.smiles = smiles
+        self.mol = mol
+
+    def __hash__(self) -> int:
+        return hash(self.smiles)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, _SmilesKeyedMol) and other.smiles == self.smiles
+
+
+@functools.lru_cache(maxsize=4096)
+def _properties_for_mol(key: _SmilesKeyedMol) -> Dict[str, Any]:
+    rdkit = _rdkit()
+    Chem, rdMolDescriptors = rdkit.Chem, rdkit.rdMolDescriptors
+
+    mol, key.mol = key.mol, None
+    return {
+        "molecular_weight": rdMolDescriptors.CalcExactMolWt(mol),
+        "logp": rdMolDescriptors.CalcCrippenDescriptors(mol)[0],
+        "hbd": rdMolDescriptors.CalcNumHBD(mol),
+        "hba": rdMolDescriptors.CalcNumHBA(mol),
+        "tpsa": rdMolDescriptors.CalcTPSA(mol),
+        "rotatable_bonds": rdMolDescriptors.CalcNumRotatableBonds(mol),
+        "aromatic_rings": rdMolDescriptors.CalcNumAromaticRings(mol),
+        "heavy_atoms": mol.GetNumHeavyAtoms(),
+        "formal_charge": Chem.rdmolops.GetFormalCharge(mol),
+    }
+
+
+def _calculate_molecular_properties(
+    mol, smiles: Optional[str] = None
+) -> Dict[str, Any]:
+    """Calculate basic molecular properties, cached by canonical SMILES.
+
+    Pass ``smiles`` when the caller already has the canonical SMILES of
+    ``mol`` to skip canonicalizing it again.
+    """
+    if mol is None:
+        return {}
+    try:
+        if smiles is None:
+            smiles = _rdkit().Chem.MolToSmiles(mol)
+        key = _SmilesKeyedMol(smiles, mol)
+        return dict(_properties_for_mol(key))
+    except Exception:
+        return {}
+
+
+def _to_base64(data: bytes) -> str:
+    # Base64 output is pure ASCII, so skip the UTF-8 decoder
+    return base64.b64encode(data).decode("ascii")
+
+
+def _render_molecule_2d(
+    input_type: str,
+    value: str,
+    width: int,
+    height: int,
+    output_format: str,
+    show_atom_numbers: bool = False,
+    show_bond_numbers: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """Build, lay out and draw one molecule.
+
+    Runs in pool workers for ``run_batch``, so it only takes and returns
+    plain data (no RDKit objects cross the process boundary). Returns None
+    when RDKit cannot parse the input.
+    """
+    rdkit = _rdkit()
+    Chem, rdMolDraw2D = rdkit.Chem, rdkit.rdMolDraw2D
+
+    if input_type == "InChI":
+        mol = Chem.MolFromInchi(value)
+    else:
+        mol = Chem.MolFromSmiles(value)
+    if mol is None:
+        return None
+
+    # Generate 2D coordinates
+    rdkit.rdDepictor.Compute2DCoords(mol)
+
+    # Generate image
+    if output_format.lower() == "svg":
+        options = rdMolDraw2D.MolDrawOptions()
+        options.addAtomIndices = show_atom_numbers
+        options.addBondIndices = show_bond_numbers
+        img_data = rdkit.Draw.MolToSVG(mol, size=(width, height), drawOptions=options)
+        static_image = _to_base64(img_data.encode("utf-8"))
+    else:
+        # Cairo emits PNG bytes directly, without a PIL image round-trip
+        drawer = rdMolDraw2D.MolDraw2DCairo(width, height)
+        options = drawer.drawOptions()
+        options.addAtomIndices = show_atom_numbers
+        options.addBondIndices = show_bond_numbers
+        rdMolDraw2D.PrepareAndDrawMolecule(drawer, mol)
+        drawer.FinishDrawing()
+        static_image = _to_base64(drawer.GetDrawingText())
+
+    smiles = Chem.MolToSmiles(mol)
+    return {
+        "static_image": static_image,
+        "mol_props": _calculate_molecular_properties(mol, smiles),
+        "smiles": smiles,
+    }
+
+
+# Static document head for _create_molecule_html, kept out of the per-call f-string.
+_MOLECULE_HTML_HEAD = """
+            <!DOCTYPE html>
+            <html>
+            <head>
+                <meta charset="utf-8">
+                <title>2D Molecule Visualization</title>
+                <style>
+                    body {
+                        font-family: Arial, sans-serif;
+                        margin: 20px;
+                        max-width: 1000px;
+                    }
+                    .molecule-container {
+                        border: 1px solid #ccc;
+                        border-radius: 5px;
+                        padding: 20px;
+                        margin: 10px 0;
+                        text-align: center;
+                    }
+                    .molecule-image {
+                        margin: 10px 0;
+                    }
+                    .properties {
+                        margin: 20px 0;
+                        text-align: left;
+                    }
+                    .info {
+                        background-color: #f5f5f5;
+                        padding: 10px;
+                        border-radius: 5px;
+                        margin: 10px 0;
+                    }
+                </style>
+            </head>"""
+
 
 @register_tool("Molecule2DTool")
 class Molecule2DTool(VisualizationTool):
@@ -22,161 +276,165 @@ class Molecule2DTool(VisualizationTool):
     def run(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Generate 2D molecular structure visualization."""
         try:
-            # Suppress RDKit RuntimeWarnings about converter registration
-            with warnings.catch_warnings():
-                warnings.filterwarnings(
-                    "ignore", category=RuntimeWarning, module="importlib._bootstrap"
-                )
-                from rdkit import Chem
-                from rdkit.Chem import Draw
-                from rdkit.Chem import rdDepictor
-
-            # Extract parameters
-            smiles = arguments.get("smiles")
-            inchi = arguments.get("inchi")
-            molecule_name = arguments.get("molecule_name")
-            width = arguments.get("width", 400)
-            height = arguments.get("height", 400)
-            output_format = arguments.get("output_format", "png")
-            show_atom_numbers = arguments.get("show_atom_numbers", False)
-            show_bond_numbers = arguments.get("show_bond_numbers", False)
-
-            # Create molecule object
-            mol = None
-            input_type = ""
-            input_data = ""
-
-            if smiles:
-                mol = Chem.MolFromSmiles(smiles)
-                input_type = "SMILES"
-                input_data = smiles
-            elif inchi:
-                mol = Chem.MolFromInchi(inchi)
-                input_type = "InChI"
-                input_data = inchi
-            elif molecule_name:
-                # Try to resolve molecule name to SMILES using PubChem
-                smiles_resolved = self._resolve_molecule_name(molecule_name)
-                if smiles_resolved:
-                    mol = Chem.MolFromSmiles(smiles_resolved)
-                    input_type = "Molecule Name"
-                    input_data = f"{molecule_name} -> {smiles_resolved}"
-                else:
-                    return self.create_error_response(
-                        f"Could not resolve molecule name: {molecule_name}"
-                    )
-            else:
-                return self.create_error_response(
-                    "Either smiles, inchi, or molecule_name must be provided"
+            input_type, value, input_data = self._resolve_input(arguments)
+            rendered = _render_molecule_2d(
+                input_type, value, *self._render_options(arguments)
+            )
+            return self._build_response(arguments, input_type, input_data, rendered)
+        except Exception as e:
+            return self._error_from_exception(e)
+
+    def run_batch(self, args_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Generate visualizations for many molecules in parallel.
+
+        Name resolution stays in this process; RDKit layout and drawing run
+        in a shared process pool. Results keep the input order.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(args_list)
+        pending = []
+        for i, arguments in enumerate(args_list):
+            try:
+                pending.append((i, arguments, *self._resolve_input(arguments)))
+            except Exception as e:
+                results[i] = self._error_from_exception(e)
+
+        if len(pending) < 2:
+            for i, arguments, *_ in pending:
+                results[i] = self.run(arguments)
+            return results
+
+        pool = _get_pool()
+        try:
+            futures = [
+                pool.submit(
+                    _render_molecule_2d,
+                    input_type,
+                    value,
+                    *self._render_options(arguments),
                 )
+                for _, arguments, input_type, value, _ in pending
+            ]
+        except BrokenProcessPool as e:
+            _discard_pool(pool)
+            for i, *_ in pending:
+                results[i] = self._error_from_exception(e)
+            return results
 
-            if mol is None:
-                return self.create_error_response(
-                    "Failed to create molecule from input"
+        for (i, arguments, input_type, _, input_data), future in zip(pending, futures):
+            try:
+                results[i] = self._build_response(
+                    arguments, input_type, input_data, future.result()
                 )
+            except BrokenProcessPool as e:
+                # A crashed worker (e.g. RDKit aborting on bad input) breaks
+                # the whole pool; replace it rather than fail later batches
+                _discard_pool(pool)
+                results[i] = self._error_from_exception(e)
+            except Exception as e:
+                results[i] = self._error_from_exception(e)
+        return results
+
+    @staticmethod
+    def _render_options(arguments: Dict[str, Any]) -> Tuple[int, int, str, bool, bool]:
+        return (
+            arguments.get("width", 400),
+            arguments.get("height", 400),
+            arguments.get("output_format", "png"),
+            arguments.get("show_atom_numbers", False),
+            arguments.get("show_bond_numbers", False),
+        )
 
-            # Generate 2D coordinates
-            rdDepictor.Compute2DCoords(mol)
+    def _resolve_input(self, arguments: Dict[str, Any]) -> Tuple[str, str, str]:
+        """Return ``(input_type, smiles_or_inchi, input_data)`` for the request."""
+        smiles = arguments.get("smiles")
+        inchi = arguments.get("inchi")
+        molecule_name = arguments.get("molecule_name")
 
-            # Generate image
-            if output_format.lower() == "svg":
-                img_data = Draw.MolToSVG(mol, size=(width, height))
-                static_image = base64.b64encode(img_data.encode("utf-8")).decode(
-                    "utf-8"
+        if smiles:
+            return "SMILES", smiles, smiles
+        if inchi:
+            return "InChI", inchi, inchi
+        if molecule_name:
+            # Try to resolve molecule name to SMILES using PubChem
+            smiles_resolved = self._resolve_molecule_name(molecule_name)
+            if smiles_resolved:
+                return (
+                    "Molecule Name",
+                    smiles_resolved,
+                    f"{molecule_name} -> {smiles_resolved}",
                 )
-            else:
-                # Generate PNG
-                img = Draw.MolToImage(mol, size=(width, height))
-
-                # Convert to base64
-                buffer = io.BytesIO()
-                img.save(buffer, format="PNG")
-                img_data = buffer.getvalue()
-                static_image = self.convert_to_base64_image(img_data, "PNG")
-
-            # Calculate molecular properties
-            mol_props = self._calculate_molecular_properties(mol)
-
-            # Create modern HTML content
-            html_content = self.create_molecule_2d_html(
-                static_image,
-                mol_props,
-                width,
-                height,
-                title=f"2D Molecular Structure: {input_data[:20]}{'...' if len(input_data) > 20 else ''}",
-            )
+            raise _InputError(f"Could not resolve molecule name: {molecule_name}")
+        raise _InputError("Either smiles, inchi, or molecule_name must be provided")
+
+    def _build_response(
+        self,
+        arguments: Dict[str, Any],
+        input_type: str,
+        input_data: str,
+        rendered: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        if rendered is None:
+            return self.create_error_response("Failed to create molecule from input")
+
+        width, height, output_format, *_ = self._render_options(arguments)
+        mol_props = rendered["mol_props"]
+
+        # Create modern HTML content
+        html_content = self.create_molecule_2d_html(
+            rendered["static_image"],
+            mol_props,
+            width,
+            height,
+            title=f"2D Molecular Structure: {input_data[:20]}{'...' if len(input_data) > 20 else ''}",
+        )
 
-            # Prepare metadata
-            metadata = {
-                "width": width,
-                "height": height,
-                "output_format": output_format,
-                "input_type": input_type,
-                "show_atom_numbers": show_atom_numbers,
-                "show_bond_numbers": show_bond_numbers,
+        # Prepare metadata
+        metadata = {
+            "width": width,
+            "height": height,
+            "output_format": output_format,
+            "input_type": input_type,
+            "show_atom_numbers": arguments.get("show_atom_numbers", False),
+            "show_bond_numbers": arguments.get("show_bond_numbers", False),
+            "molecular_properties": mol_props,
+        }
+
+        return self.create_visualization_response(
+            html_content=html_content,
+            viz_type="molecule_2d",
+            data={
+                "input_data": input_data,
                 "molecular_properties": mol_props,
-            }
-
-            return self.create_visualization_response(
-                html_content=html_content,
-                viz_type="molecule_2d",
-                data={
-                    "input_data": input_data,
-                    "molecular_properties": mol_props,
-                    "smiles": Chem.MolToSmiles(mol) if mol else None,
-                },
-                static_image=static_image,
-                metadata=metadata,
-            )
+                "smiles": rendered["smiles"],
+            },
+            static_image=rendered["static_image"],
+            metadata=metadata,
+        )
 
-        except ImportError:
+    def _error_from_exception(self, error: Exception) -> Dict[str, Any]:
+        if isinstance(error, _InputError):
+            return self.create_error_response(str(error))
+        if isinstance(error, ImportError):
             return self.create_error_response(
                 "RDKit is not installed. Please install it with: " "pip install rdkit",
                 "MissingDependency",
             )
-        except Exception as e:
-            return self.create_error_response(
-                f"Failed to create molecule visualization: {str(e)}"
-            )
+        return self.create_error_response(
+            f"Failed to create molecule visualization: {str(error)}"
+        )
 
     def _resolve_molecule_name(self, name: str) -> Optional[str]:
         """Resolve molecule name to SMILES using PubChem."""
         try:
-            # Use PubChem PUG REST API
-            url = (
-                f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/"
-                f"{name}/property/IsomericSMILES/JSON"
-            )
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                if "PropertyTable" in data and "Properties" in data["PropertyTable"]:
-                    props = data["PropertyTable"]["Properties"]
-                    if props and "IsomericSMILES" in props[0]:
-                        return props[0]["IsomericSMILES"]
+            return _pubchem_smiles(name)
         except Exception:
-            pass
-        return None
+            return None
 
-    def _calculate_molecular_properties(self, mol) -> Dict[str, Any]:
+    def _calculate_molecular_properties(
+        self, mol, smiles: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Calculate basic molecular properties."""
-        try:
-            from rdkit import Chem
-            from rdkit.Chem import rdMolDescriptors
-
-            return {
-                "molecular_weight": rdMolDescriptors.CalcExactMolWt(mol),
-                "logp": rdMolDescriptors.CalcCrippenDescriptors(mol)[0],
-                "hbd": rdMolDescriptors.CalcNumHBD(mol),
-                "hba": rdMolDescriptors.CalcNumHBA(mol),
-                "tpsa": rdMolDescriptors.CalcTPSA(mol),
-                "rotatable_bonds": rdMolDescriptors.CalcNumRotatableBonds(mol),
-                "aromatic_rings": rdMolDescriptors.CalcNumAromaticRings(mol),
-                "heavy_atoms": mol.GetNumHeavyAtoms(),
-                "formal_charge": Chem.rdmolops.GetFormalCharge(mol),
-            }
-        except Exception:
-            return {}
+        return _calculate_molecular_properties(mol, smiles)
 
     def _create_molecule_html(
         self,
@@ -187,62 +445,41 @@ class Molecule2DTool(VisualizationTool):
         height: int,
         static_image: str,
         output_format: str,
+        *,
+        mol_props: Optional[Dict[str, Any]] = None,
+        smiles: Optional[str] = None,
     ) -> str:
-        """Create HTML content for molecule visualization."""
-        try:
-            from rdkit import Chem
+        """Create HTML content for molecule visualization.
 
-            smiles = Chem.MolToSmiles(mol)
-            mol_props = self._calculate_molecular_properties(mol)
+        Pass ``mol_props``/``smiles`` when the caller already has them to
+        skip recomputing them from ``mol``.
+        """
+        try:
+            if smiles is None:
+                smiles = _rdkit().Chem.MolToSmiles(mol)
+            if mol_props is None:
+                mol_props = self._calculate_molecular_properties(mol, smiles)
 
             # Create properties table
             props_html = ""
             if mol_props:
-                props_html = (
+                parts = [
                     "<table border='1' "
-                    "style='border-collapse: collapse; margin: 10px 0;'>"
+                    "style='border-collapse: collapse; margin: 10px 0;'>",
+                    "<tr><th>Property</th><th>Value</th></tr>",
+                ]
+                parts.extend(
+                    f"<tr><td>{prop}</td><td>"
+                    f"{f'{value:.2f}' if isinstance(value, float) else value}"
+                    "</td></tr>"
+                    for prop, value in mol_props.items()
                 )
-                props_html += "<tr><th>Property</th><th>Value</th></tr>"
-                for prop, value in mol_props.items():
-                    if isinstance(value, float):
-                        value = f"{value:.2f}"
-                    props_html += f"<tr><td>{prop}</td><td>{value}</td></tr>"
-                props_html += "</table>"
-
-            return f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="utf-8">
-                <title>2D Molecule Visualization</title>
-                <style>
-                    body {{
-                        font-family: Arial, sans-serif;
-                        margin: 20px;
-                        max-width: 1000px;
-                    }}
-                    .molecule-container {{
-                        border: 1px solid #ccc;
-                        border-radius: 5px;
-                        padding: 20px;
-                        margin: 10px 0;
-                        text-align: center;
-                    }}
-                    .molecule-image {{
-                        margin: 10px 0;
-                    }}
-                    .properties {{
-                        margin: 20px 0;
-                        text-align: left;
-                    }}
-                    .info {{
-                        background-color: #f5f5f5;
-                        padding: 10px;
-                        border-radius: 5px;
-                        margin: 10px 0;
-                    }}
-                </style>
-            </head>
+                parts.append("</table>")
+                props_html = "".join(parts)
+
+            return (
+                _MOLECULE_HTML_HEAD
+                + f"""
             <body>
                 <h2>2D Molecular Structure Visualization</h2>
 
@@ -276,5 +513,6 @@ class Molecule2DTool(VisualizationTool):
             </body>
             </html>
             """
+            )
         except Exception as e:
             return f"<div class='error'>Error creating HTML: {str(e)}</div>"
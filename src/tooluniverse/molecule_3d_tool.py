@@ -6,10 +6,408 @@ Tool for visualizing 3D molecular structures using RDKit and py3Dmol.
 Supports SMILES, MOL files, SDF content, and various visualization styles.
 """
 
+import asyncio
+import functools
+import os
+import threading
+import uuid
 import warnings
-from typing import Any, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 from .visualization_tool import VisualizationTool
 from .tool_registry import register_tool
+from .logging_config import get_logger
+
+# Import once at load time; RDKit warns about converter registration on import
+with warnings.catch_warnings():
+    warnings.filterwarnings(
+        "ignore", category=RuntimeWarning, module="importlib._bootstrap"
+    )
+    try:
+        import py3Dmol
+    except ImportError:
+        py3Dmol = None
+    try:
+        from rdkit import Chem
+        from rdkit.Chem import AllChem, rdMolDescriptors
+    except ImportError:
+        Chem = AllChem = rdMolDescriptors = None
+
+logger = get_logger(__name__)
+
+# Fixed ETKDG seed: the same input always yields the same coordinates
+_EMBED_SEED = 0xC0FFEE
+
+# Single conformers of molecules this small look the same without MMFF,
+# so minimization is skipped unless the caller asks for it
+_SMALL_MOLECULE_HEAVY_ATOMS = 15
+_MINIMIZE_SKIP_LOGGED = False
+
+# Thread pool shared by run_batch and run_async; RDKit embedding and MMFF
+# release the GIL, so requests overlap across cores. Created on first use.
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+if py3Dmol is None:
+    _MISSING_PACKAGE = "py3Dmol"
+elif Chem is None:
+    _MISSING_PACKAGE = "rdkit"
+else:
+    _MISSING_PACKAGE = None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ThreadPoolExecutor(max_workers=os.cpu_count())
+    return _POOL
+
+
+# Static HTML fragments shared by every render
+_TOOLBAR_HTML = """
+        <div class="toolbar">
+            <button class="btn" onclick="resetView()">Reset View</button>
+            <button class="btn btn-secondary" onclick="downloadScreenshot()">Screenshot</button>
+            <button class="btn btn-outline" onclick="toggleFullscreen()">Fullscreen</button>
+        </div>
+        """
+_CARD_ICON_SVG = (
+    '<svg class="card-icon" viewBox="0 0 24 24">'
+    '<path d="M12,2A10,10 0 0,0 2,12A10,10 0 0,0 12,22A10,10 0 0,0 22,12'
+    "A10,10 0 0,0 12,2M12,4A8,8 0 0,1 20,12A8,8 0 0,1 12,20A8,8 0 0,1 4,12"
+    "A8,8 0 0,1 12,4M12,6A6,6 0 0,0 6,12A6,6 0 0,0 12,18A6,6 0 0,0 18,12"
+    "A6,6 0 0,0 12,6M12,8A4,4 0 0,1 16,12A4,4 0 0,1 12,16A4,4 0 0,1 8,12"
+    'A4,4 0 0,1 12,8Z"/></svg>'
+)
+
+# py3Dmol (representation, options) for each supported style
+_STYLE_TEMPLATES = {
+    "stick": ("stick", {}),
+    "sphere": ("sphere", {}),
+    "cartoon": ("cartoon", {}),
+    "line": ("line", {}),
+    "spacefill": ("sphere", {"scale": 0.3}),
+}
+
+# Color schemes that are 3Dmol.js named color schemes rather than colors;
+# anything else is passed through as a plain color (e.g. "spectrum")
+_COLOR_SPECS = {
+    "default": ("colorscheme", "default"),
+    "elem": ("colorscheme", "default"),
+    **{
+        name: ("colorscheme", name)
+        for name in (
+            "ssPyMOL",
+            "ssJmol",
+            "Jmol",
+            "amino",
+            "shapely",
+            "nucleic",
+            "chain",
+        )
+    },
+}
+
+# (value, label) pairs for the control panel <select> elements
+_STYLE_OPTIONS = (
+    ("stick", "Stick"),
+    ("sphere", "Sphere"),
+    ("cartoon", "Cartoon"),
+    ("line", "Line"),
+    ("spacefill", "Spacefill"),
+)
+_COLOR_OPTIONS = (
+    ("default", "Default"),
+    ("spectrum", "Spectrum"),
+    ("rainbow", "Rainbow"),
+    ("elem", "Element"),
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _select_options(options: Tuple[Tuple[str, str], ...], current: str) -> str:
+    return "".join(
+        f'<option value="{value}"{" selected" if value == current else ""}>'
+        f"{label}</option>"
+        for value, label in options
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def _control_panel_html(current_style: str, current_color: str) -> str:
+    """Control panel markup; there are only a few style/color combinations."""
+    return f"""
+        <div class="control-panel">
+            <div class="control-group">
+                <label class="control-label">Style</label>
+                <select class="control-select" id="styleSelect" onchange="changeStyle()">
+                    {_select_options(_STYLE_OPTIONS, current_style)}
+                </select>
+            </div>
+            <div class="control-group">
+                <label class="control-label">Color Scheme</label>
+                <select class="control-select" id="colorSelect" onchange="changeColor()">
+                    {_select_options(_COLOR_OPTIONS, current_color)}
+                </select>
+            </div>
+            <div class="control-group">
+                <label class="control-label">Background</label>
+                <select class="control-select" id="bgSelect" onchange="changeBackground()">
+                    <option value="white" selected>White</option>
+                    <option value="black">Black</option>
+                    <option value="gray">Gray</option>
+                </select>
+            </div>
+        </div>
+        """
+
+
+# RDKit property names computed in one pass, with the response key and type
+_PROPERTY_NAMES = (
+    "exactmw",
+    "CrippenClogP",
+    "NumHBD",
+    "NumHBA",
+    "tpsa",
+    "NumRotatableBonds",
+    "NumAromaticRings",
+)
+_PROPERTY_KEYS = (
+    ("molecular_weight", float),
+    ("logp", float),
+    ("hbd", int),
+    ("hba", int),
+    ("tpsa", float),
+    ("rotatable_bonds", int),
+    ("aromatic_rings", int),
+)
+
+# (key, default) pairs read by the info cards, in unpacking order
+_INFO_CARD_FIELDS = (("smiles", "N/A"),) + tuple(
+    (key, 0)
+    for key in (
+        "molecular_weight",
+        "logp",
+        "hbd",
+        "hba",
+        "tpsa",
+        "rotatable_bonds",
+        "aromatic_rings",
+        "heavy_atoms",
+        "formal_charge",
+    )
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _property_calculator():
+    return rdMolDescriptors.Properties(list(_PROPERTY_NAMES))
+
+
+def _calculate_molecular_properties(mol) -> Dict[str, Any]:
+    """Calculate basic molecular properties."""
+    try:
+        values = _property_calculator().ComputeProperties(mol)
+        props: Dict[str, Any] = {
+            key: cast(value) for (key, cast), value in zip(_PROPERTY_KEYS, values)
+        }
+        props["heavy_atoms"] = mol.GetNumHeavyAtoms()
+        props["formal_charge"] = Chem.rdmolops.GetFormalCharge(mol)
+        props["num_conformers"] = mol.GetNumConformers()
+        return props
+    except Exception:
+        return {}
+
+
+def _embed_params():
+    """ETKDGv3 parameters with a fixed seed so embeddings are reproducible."""
+    params = AllChem.ETKDGv3()
+    params.randomSeed = _EMBED_SEED
+    params.pruneRmsThresh = 1.0
+    return params
+
+
+def _should_minimize(mol, conformer_count: int, minimize: Optional[bool]) -> bool:
+    """Whether to MMFF-optimize; by default skipped for one small conformer."""
+    global _MINIMIZE_SKIP_LOGGED
+    if minimize is not None:
+        return minimize
+    # With several conformers the MMFF energies pick the best one
+    if conformer_count > 1 or mol.GetNumHeavyAtoms() > _SMALL_MOLECULE_HEAVY_ATOMS:
+        return True
+    if not _MINIMIZE_SKIP_LOGGED:
+        _MINIMIZE_SKIP_LOGGED = True
+        logger.info(
+            "Skipping MMFF minimization for molecules with at most %d heavy atoms; "
+            "pass minimize=True to force it",
+            _SMALL_MOLECULE_HEAVY_ATOMS,
+        )
+    return False
+
+
+def _prepare_3d(
+    mol,
+    show_hydrogens: bool,
+    generate_conformers: bool,
+    conformer_count: int,
+    minimize: Optional[bool] = None,
+) -> Tuple[str, Dict[str, Any], str, int]:
+    """Embed ``mol`` in 3D.
+
+    Returns ``(mol_block, mol_props, canonical_smiles, num_conformers)``.
+    """
+    # Canonicalize the input before hydrogens and coordinates are added
+    has_h_atoms = mol.GetNumAtoms() != mol.GetNumHeavyAtoms()
+    canonical_smiles = Chem.MolToSmiles(Chem.RemoveHs(mol) if has_h_atoms else mol)
+
+    # Add hydrogens if requested, unless every hydrogen is already an atom
+    if show_hydrogens and any(atom.GetTotalNumHs() for atom in mol.GetAtoms()):
+        mol = Chem.AddHs(mol)
+
+    # Generate 3D coordinates; random starting coordinates rescue
+    # inputs (e.g. fused rings) that ETKDG cannot embed directly
+    params = _embed_params()
+    num_conformers = 1
+    optimize = _should_minimize(
+        mol, conformer_count if generate_conformers else 1, minimize
+    )
+    if generate_conformers:
+        # Embed and optimize all conformers in single RDKit calls
+        conf_ids = list(
+            AllChem.EmbedMultipleConfs(mol, numConfs=conformer_count, params=params)
+        )
+        if not conf_ids:
+            params.useRandomCoords = True
+            conf_ids = list(
+                AllChem.EmbedMultipleConfs(mol, numConfs=conformer_count, params=params)
+            )
+        if conf_ids:
+            best = 0
+            if optimize:
+                try:
+                    results = AllChem.MMFFOptimizeMoleculeConfs(mol, numThreads=0)
+                    # Keep the lowest-energy conformer for visualization
+                    best = min(range(len(conf_ids)), key=lambda i: results[i][1])
+                except Exception:
+                    pass
+            # Drop the other conformers in place rather than copying the mol
+            for i, conf_id in enumerate(conf_ids):
+                if i != best:
+                    mol.RemoveConformer(conf_id)
+        else:
+            # Fallback to basic embedding
+            AllChem.EmbedMolecule(mol)
+        num_conformers = len(conf_ids) or 1
+    else:
+        # Generate single conformer
+        if AllChem.EmbedMolecule(mol, params) < 0:
+            params.useRandomCoords = True
+            AllChem.EmbedMolecule(mol, params)
+        if optimize:
+            try:
+                AllChem.MMFFOptimizeMolecule(mol)
+            except Exception:
+                pass
+
+    return (
+        # The viewer only needs coordinates and elements; skip kekulization
+        Chem.MolToMolBlock(mol, kekulize=False),
+        _calculate_molecular_properties(mol),
+        canonical_smiles,
+        num_conformers,
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _prepare_smiles_3d(
+    smiles: str,
+    show_hydrogens: bool,
+    generate_conformers: bool,
+    conformer_count: int,
+    minimize: Optional[bool] = None,
+) -> Optional[Tuple[str, Dict[str, Any], str, int]]:
+    """Cached :func:`_prepare_3d` for SMILES input; None if it does not parse.
+
+    Embedding is seeded, so the result is a pure function of the arguments.
+    """
+    mol = Chem.MolFromSmiles(smiles)
+    if mol is None:
+        return None
+    return _prepare_3d(
+        mol, show_hydrogens, generate_conformers, conformer_count, minimize
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def _viewer_html(
+    mol_block: str,
+    style: str,
+    color_scheme: str,
+    width: int,
+    height: int,
+    show_surface: bool,
+) -> Tuple[str, str]:
+    """
+    Build the py3Dmol viewer for a MOL block and return its HTML together
+    with the unique id py3Dmol embedded in it.
+    """
+    viewer = py3Dmol.view(width=width, height=height)
+    viewer.addModel(mol_block, "mol")
+
+    # Apply visualization style; unknown styles render as sticks
+    representation, options = _STYLE_TEMPLATES.get(style, _STYLE_TEMPLATES["stick"])
+    color_key, color_value = _COLOR_SPECS.get(color_scheme, ("color", color_scheme))
+    viewer.setStyle({representation: {**options, color_key: color_value}})
+
+    # Add surface if requested
+    if show_surface:
+        viewer.addSurface(py3Dmol.VDW, {"opacity": 0.7, "color": "white"})
+
+    # Zoom to fit
+    viewer.zoomTo()
+    html = viewer._make_html()
+    return html, viewer.uniqueid
+
+
+# Static document head for _create_molecule_html, kept out of the per-call f-string.
+_MOLECULE_HTML_HEAD = """
+            <!DOCTYPE html>
+            <html>
+            <head>
+                <meta charset="utf-8">
+                <title>3D Molecule Visualization</title>
+                <style>
+                    body {
+                        font-family: Arial, sans-serif;
+                        margin: 20px;
+                        max-width: 1200px;
+                    }
+                    .molecule-container {
+                        border: 1px solid #ccc;
+                        border-radius: 5px;
+                        padding: 20px;
+                        margin: 10px 0;
+                        text-align: center;
+                    }
+                    .properties {
+                        margin: 20px 0;
+                        text-align: left;
+                    }
+                    .info {
+                        background-color: #f5f5f5;
+                        padding: 10px;
+                        border-radius: 5px;
+                        margin: 10px 0;
+                    }
+                    .viewer-container {
+                        border: 1px solid #ccc;
+                        border-radius: 5px;
+                        margin: 10px 0;
+                    }
+                </style>
+            </head>"""
 
 
 @register_tool("Molecule3DTool")
@@ -18,16 +416,9 @@ class Molecule3DTool(VisualizationTool):
 
     def run(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """Generate 3D molecular structure visualization."""
+        if _MISSING_PACKAGE:
+            return self._missing_dependency_response(_MISSING_PACKAGE)
         try:
-            # Suppress RDKit RuntimeWarnings about converter registration
-            with warnings.catch_warnings():
-                warnings.filterwarnings(
-                    "ignore", category=RuntimeWarning, module="importlib._bootstrap"
-                )
-                import py3Dmol
-                from rdkit import Chem
-                from rdkit.Chem import AllChem
-
             # Extract parameters
             smiles = arguments.get("smiles")
             mol_content = arguments.get("mol_content")
@@ -40,100 +431,56 @@ class Molecule3DTool(VisualizationTool):
             show_surface = arguments.get("show_surface", False)
             generate_conformers = arguments.get("generate_conformers", True)
             conformer_count = arguments.get("conformer_count", 1)
+            minimize = arguments.get("minimize")
 
             # Create molecule object
-            mol = None
-            input_type = ""
-            input_data = ""
-
             if smiles:
-                mol = Chem.MolFromSmiles(smiles)
                 input_type = "SMILES"
                 input_data = smiles
-            elif mol_content:
-                mol = Chem.MolFromMolBlock(mol_content)
-                input_type = "MOL"
-                input_data = (
-                    mol_content[:100] + "..." if len(mol_content) > 100 else mol_content
+                # Repeat views of the same SMILES skip embedding entirely
+                prepared = _prepare_smiles_3d(
+                    smiles,
+                    show_hydrogens,
+                    generate_conformers,
+                    conformer_count,
+                    minimize,
                 )
-            elif sdf_content:
-                mol = Chem.MolFromMolBlock(sdf_content)
-                input_type = "SDF"
-                input_data = (
-                    sdf_content[:100] + "..." if len(sdf_content) > 100 else sdf_content
+            elif mol_content or sdf_content:
+                content = mol_content or sdf_content
+                input_type = "MOL" if mol_content else "SDF"
+                input_data = content[:100] + "..." if len(content) > 100 else content
+                # Keep explicit hydrogens from the file when they will be shown
+                mol = Chem.MolFromMolBlock(content, removeHs=not show_hydrogens)
+                prepared = (
+                    _prepare_3d(
+                        mol,
+                        show_hydrogens,
+                        generate_conformers,
+                        conformer_count,
+                        minimize,
+                    )
+                    if mol is not None
+                    else None
                 )
             else:
                 return self.create_error_response(
                     "Either smiles, mol_content, or sdf_content must be " "provided"
                 )
 
-            if mol is None:
+            if prepared is None:
                 return self.create_error_response(
                     "Failed to create molecule from input"
                 )
-
-            # Add hydrogens if requested
-            if show_hydrogens:
-                mol = Chem.AddHs(mol)
-
-            # Generate 3D coordinates
-            if generate_conformers:
-                # Generate multiple conformers
-                conformers = []
-                for _ in range(conformer_count):
-                    conf_mol = Chem.Mol(mol)
-                    try:
-                        AllChem.EmbedMolecule(conf_mol, AllChem.ETKDG())
-                        AllChem.MMFFOptimizeMolecule(conf_mol)
-                        conformers.append(conf_mol)
-                    except Exception:
-                        # Fallback to basic embedding
-                        AllChem.EmbedMolecule(conf_mol)
-                        conformers.append(conf_mol)
-                # Use the first conformer for visualization
-                mol = conformers[0] if conformers else mol
-            else:
-                # Generate single conformer
-                try:
-                    AllChem.EmbedMolecule(mol, AllChem.ETKDG())
-                    AllChem.MMFFOptimizeMolecule(mol)
-                except Exception:
-                    # Fallback to basic embedding
-                    AllChem.EmbedMolecule(mol)
-
-            # Convert to MOL block for py3Dmol
-            mol_block = Chem.MolToMolBlock(mol)
-
-            # Create py3Dmol viewer
-            viewer = py3Dmol.view(width=width, height=height)
-            viewer.addModel(mol_block, "mol")
-
-            # Apply visualization style
-            if style == "stick":
-                viewer.setStyle({"stick": {"color": color_scheme}})
-            elif style == "sphere":
-                viewer.setStyle({"sphere": {"color": color_scheme}})
-            elif style == "cartoon":
-                viewer.setStyle({"cartoon": {"color": color_scheme}})
-            elif style == "line":
-                viewer.setStyle({"line": {"color": color_scheme}})
-            elif style == "spacefill":
-                viewer.setStyle({"sphere": {"scale": 0.3, "color": color_scheme}})
-            else:
-                viewer.setStyle({"stick": {"color": color_scheme}})
-
-            # Add surface if requested
-            if show_surface:
-                viewer.addSurface(py3Dmol.VDW, {"opacity": 0.7, "color": "white"})
-
-            # Zoom to fit
-            viewer.zoomTo()
-
-            # Calculate molecular properties first
-            mol_props = self._calculate_molecular_properties(mol)
-
-            # Generate HTML with modern UI
-            viewer_html = viewer._make_html()
+            mol_block, mol_props, canonical_smiles, num_conformers = prepared
+            mol_props = dict(mol_props)
+
+            # Viewer HTML is cached, so restyling a molecule skips py3Dmol.
+            # Each response gets its own element id so that several viewers
+            # can share one page.
+            viewer_html, viewer_id = _viewer_html(
+                mol_block, style, color_scheme, width, height, bool(show_surface)
+            )
+            viewer_html = viewer_html.replace(viewer_id, uuid.uuid4().hex)
 
             # Create control panel
             control_panel = self._create_molecule_control_panel(style, color_scheme)
@@ -180,44 +527,46 @@ class Molecule3DTool(VisualizationTool):
                 data={
                     "input_data": input_data,
                     "molecular_properties": mol_props,
-                    "smiles": Chem.MolToSmiles(mol) if mol else None,
-                    "conformer_count": len(conformers) if generate_conformers else 1,
+                    "smiles": canonical_smiles,
+                    "conformer_count": num_conformers,
                 },
                 metadata=metadata,
             )
 
         except ImportError as e:
-            missing_package = "py3Dmol" if "py3Dmol" in str(e) else "rdkit"
-            return self.create_error_response(
-                f"{missing_package} is not installed. Please install it with: "
-                f"pip install {missing_package}",
-                "MissingDependency",
+            return self._missing_dependency_response(
+                "py3Dmol" if "py3Dmol" in str(e) else "rdkit"
             )
         except Exception as e:
             return self.create_error_response(
                 f"Failed to create molecule 3D visualization: {str(e)}"
             )
 
+    def run_batch(self, args_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Generate visualizations for many molecules concurrently.
+
+        Each request runs on the shared thread pool. Results keep the input
+        order.
+        """
+        if len(args_list) < 2:
+            return [self.run(arguments) for arguments in args_list]
+        return list(_get_pool().map(self.run, args_list))
+
+    async def run_async(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Run on the shared thread pool without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_pool(), self.run, arguments)
+
+    def _missing_dependency_response(self, missing_package: str) -> Dict[str, Any]:
+        return self.create_error_response(
+            f"{missing_package} is not installed. Please install it with: "
+            f"pip install {missing_package}",
+            "MissingDependency",
+        )
+
     def _calculate_molecular_properties(self, mol) -> Dict[str, Any]:
         """Calculate basic molecular properties."""
-        try:
-            from rdkit import Chem
-            from rdkit.Chem import rdMolDescriptors
-
-            return {
-                "molecular_weight": rdMolDescriptors.CalcExactMolWt(mol),
-                "logp": rdMolDescriptors.CalcCrippenDescriptors(mol)[0],
-                "hbd": rdMolDescriptors.CalcNumHBD(mol),
-                "hba": rdMolDescriptors.CalcNumHBA(mol),
-                "tpsa": rdMolDescriptors.CalcTPSA(mol),
-                "rotatable_bonds": rdMolDescriptors.CalcNumRotatableBonds(mol),
-                "aromatic_rings": rdMolDescriptors.CalcNumAromaticRings(mol),
-                "heavy_atoms": mol.GetNumHeavyAtoms(),
-                "formal_charge": Chem.rdmolops.GetFormalCharge(mol),
-                "num_conformers": mol.GetNumConformers(),
-            }
-        except Exception:
-            return {}
+        return _calculate_molecular_properties(mol)
 
     def _create_molecule_html(
         self,
@@ -232,60 +581,28 @@ class Molecule3DTool(VisualizationTool):
     ) -> str:
         """Create HTML content for molecule 3D visualization."""
         try:
-            from rdkit import Chem
-
             smiles = Chem.MolToSmiles(mol) if mol else "N/A"
 
             # Create properties table
             props_html = ""
             if mol_props:
-                props_html = (
+                parts = [
                     "<table border='1' "
-                    "style='border-collapse: collapse; margin: 10px 0;'>"
+                    "style='border-collapse: collapse; margin: 10px 0;'>",
+                    "<tr><th>Property</th><th>Value</th></tr>",
+                ]
+                parts.extend(
+                    f"<tr><td>{prop}</td><td>"
+                    f"{f'{value:.2f}' if isinstance(value, float) else value}"
+                    "</td></tr>"
+                    for prop, value in mol_props.items()
                 )
-                props_html += "<tr><th>Property</th><th>Value</th></tr>"
-                for prop, value in mol_props.items():
-                    if isinstance(value, float):
-                        value = f"{value:.2f}"
-                    props_html += f"<tr><td>{prop}</td><td>{value}</td></tr>"
-                props_html += "</table>"
-
-            return f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="utf-8">
-                <title>3D Molecule Visualization</title>
-                <style>
-                    body {{
-                        font-family: Arial, sans-serif;
-                        margin: 20px;
-                        max-width: 1200px;
-                    }}
-                    .molecule-container {{
-                        border: 1px solid #ccc;
-                        border-radius: 5px;
-                        padding: 20px;
-                        margin: 10px 0;
-                        text-align: center;
-                    }}
-                    .properties {{
-                        margin: 20px 0;
-                        text-align: left;
-                    }}
-                    .info {{
-                        background-color: #f5f5f5;
-                        padding: 10px;
-                        border-radius: 5px;
-                        margin: 10px 0;
-                    }}
-                    .viewer-container {{
-                        border: 1px solid #ccc;
-                        border-radius: 5px;
-                        margin: 10px 0;
-                    }}
-                </style>
-            </head>
+                parts.append("</table>")
+                props_html = "".join(parts)
+
+            return (
+                _MOLECULE_HTML_HEAD
+                + f"""
             <body>
                 <h2>3D Molecular Structure Visualization</h2>
 
@@ -318,6 +635,7 @@ class Molecule3DTool(VisualizationTool):
             </body>
             </html>
             """
+            )
         except Exception as e:
             return f"<div class='error'>Error creating HTML: {str(e)}</div>"
 
@@ -325,69 +643,33 @@ class Molecule3DTool(VisualizationTool):
         self, current_style: str, current_color: str
     ) -> str:
         """Create floating control panel HTML for molecules."""
-        return f"""
-        <div class="control-panel">
-            <div class="control-group">
-                <label class="control-label">Style</label>
-                <select class="control-select" id="styleSelect" onchange="changeStyle()">
-                    <option value="stick" {'selected' if current_style == 'stick' else ''}>Stick</option>
-                    <option value="sphere" {'selected' if current_style == 'sphere' else ''}>Sphere</option>
-                    <option value="cartoon" {'selected' if current_style == 'cartoon' else ''}>Cartoon</option>
-                    <option value="line" {'selected' if current_style == 'line' else ''}>Line</option>
-                    <option value="spacefill" {'selected' if current_style == 'spacefill' else ''}>Spacefill</option>
-                </select>
-            </div>
-            <div class="control-group">
-                <label class="control-label">Color Scheme</label>
-                <select class="control-select" id="colorSelect" onchange="changeColor()">
-                    <option value="default" {'selected' if current_color == 'default' else ''}>Default</option>
-                    <option value="spectrum" {'selected' if current_color == 'spectrum' else ''}>Spectrum</option>
-                    <option value="rainbow" {'selected' if current_color == 'rainbow' else ''}>Rainbow</option>
-                    <option value="elem" {'selected' if current_color == 'elem' else ''}>Element</option>
-                </select>
-            </div>
-            <div class="control-group">
-                <label class="control-label">Background</label>
-                <select class="control-select" id="bgSelect" onchange="changeBackground()">
-                    <option value="white" selected>White</option>
-                    <option value="black">Black</option>
-                    <option value="gray">Gray</option>
-                </select>
-            </div>
-        </div>
-        """
+        return _control_panel_html(current_style, current_color)
 
     def _create_toolbar(self) -> str:
         """Create bottom toolbar HTML."""
-        return """
-        <div class="toolbar">
-            <button class="btn" onclick="resetView()">Reset View</button>
-            <button class="btn btn-secondary" onclick="downloadScreenshot()">Screenshot</button>
-            <button class="btn btn-outline" onclick="toggleFullscreen()">Fullscreen</button>
-        </div>
-        """
+        return _TOOLBAR_HTML
 
     def _create_molecule_info_cards(
         self, input_data: str, mol_props: Dict[str, Any]
     ) -> str:
         """Create molecule information cards."""
-        smiles = mol_props.get("smiles", "N/A")
-        mol_weight = mol_props.get("molecular_weight", 0)
-        logp = mol_props.get("logp", 0)
-        hbd = mol_props.get("hbd", 0)
-        hba = mol_props.get("hba", 0)
-        tpsa = mol_props.get("tpsa", 0)
-        rotatable_bonds = mol_props.get("rotatable_bonds", 0)
-        aromatic_rings = mol_props.get("aromatic_rings", 0)
-        heavy_atoms = mol_props.get("heavy_atoms", 0)
-        formal_charge = mol_props.get("formal_charge", 0)
+        (
+            smiles,
+            mol_weight,
+            logp,
+            hbd,
+            hba,
+            tpsa,
+            rotatable_bonds,
+            aromatic_rings,
+            heavy_atoms,
+            formal_charge,
+        ) = [mol_props.get(key, default) for key, default in _INFO_CARD_FIELDS]
 
         return f"""
         <div class="card">
             <h3 class="card-title">
-                <svg class="card-icon" viewBox="0 0 24 24">
-                    <path d="M12,2A10,10 0 0,0 2,12A10,10 0 0,0 12,22A10,10 0 0,0 22,12A10,10 0 0,0 12,2M12,4A8,8 0 0,1 20,12A8,8 0 0,1 12,20A8,8 0 0,1 4,12A8,8 0 0,1 12,4M12,6A6,6 0 0,0 6,12A6,6 0 0,0 12,18A6,6 0 0,0 18,12A6,6 0 0,0 12,6M12,8A4,4 0 0,1 16,12A4,4 0 0,1 12,16A4,4 0 0,1 8,12A4,4 0 0,1 12,8Z"/>
-                </svg>
+                {_CARD_ICON_SVG}
                 Molecule Information
             </h3>
             <div class="info-grid">
@@ -412,9 +694,7 @@ class Molecule3DTool(VisualizationTool):
 
         <div class="card">
             <h3 class="card-title">
-                <svg class="card-icon" viewBox="0 0 24 24">
-                    <path d="M12,2A10,10 0 0,0 2,12A10,10 0 0,0 12,22A10,10 0 0,0 22,12A10,10 0 0,0 12,2M12,4A8,8 0 0,1 20,12A8,8 0 0,1 12,20A8,8 0 0,1 4,12A8,8 0 0,1 12,4M12,6A6,6 0 0,0 6,12A6,6 0 0,0 12,18A6,6 0 0,0 18,12A6,6 0 0,0 12,6M12,8A4,4 0 0,1 16,12A4,4 0 0,1 12,16A4,4 0 0,1 8,12A4,4 0 0,1 12,8Z"/>
-                </svg>
+                {_CARD_ICON_SVG}
                 Drug Properties
             </h3>
             <div class="info-grid">
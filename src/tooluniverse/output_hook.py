@@ -15,15 +15,188 @@ The hook system integrates seamlessly with ToolUniverse's existing architecture,
 leveraging AgenticTool and ComposeTool for intelligent output processing.
 """
 
+import atexit
+import copy
+import functools
 import json
+import operator
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
 from pathlib import Path
 from tooluniverse.logging_config import get_logger
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 _logger = get_logger(__name__)
 
 
+class _ResultMeta:
+    """
+    Lazily computed facts about one tool result, shared by every hook rule
+    evaluated for it so the result is stringified at most once.
+    """
+
+    def __init__(self, result: Any):
+        self.result = result
+
+    @functools.cached_property
+    def str_value(self) -> str:
+        return str(self.result)
+
+    @functools.cached_property
+    def length(self) -> int:
+        return len(self.str_value)
+
+
+# Comparison functions for the output_length condition's "operator" field
+_LENGTH_OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+# Result types matched by the content_type condition
+_CONTENT_TYPES = {"json": dict, "text": str}
+
+# Tools used by hooks themselves, in load order (the composer calls the
+# summarizer); their output is never post-processed
+_HOOK_TOOLS = ("ToolOutputSummarizer", "OutputSummarizationComposer")
+_HOOK_TOOL_NAMES = frozenset(_HOOK_TOOLS)
+
+# Text that looks like a JSON object or array, matched without copying it
+_JSON_TEXT_START = re.compile(r"\s*[{\[]")
+
+
+def _analyze_text(data: str) -> Tuple[str, str]:
+    if _JSON_TEXT_START.match(data):
+        return "json", "JSON string"
+    return "txt", f"text with {len(data)} characters"
+
+
+# (data_format, data_structure) for each result type FileSaveHook recognizes;
+# keyed by exact type, so bool is not mistaken for int
+_DATA_ANALYZERS: Dict[type, Callable[[Any], Tuple[str, str]]] = {
+    bool: lambda data: ("json", "boolean value"),
+    dict: lambda data: ("json", f"dict with {len(data)} keys"),
+    list: lambda data: ("json", f"list with {len(data)} items"),
+    str: _analyze_text,
+    int: lambda data: ("json", "numeric value"),
+    float: lambda data: ("json", "numeric value"),
+}
+
+
+# Common query parameter names, in order of preference
+_QUERY_KEYS = ("query", "question", "input", "text", "search_term", "prompt")
+
+_RulePredicate = Callable[[Any, str, Dict[str, Any], _ResultMeta], bool]
+
+
+def _always_true(result, tool_name, context, meta) -> bool:
+    return True
+
+
+# Characters of a result kept in FileSaveHook error responses
+_ERROR_PREVIEW_CHARS = 500
+
+
+def _output_preview(result: Any, limit: int = _ERROR_PREVIEW_CHARS) -> str:
+    """
+    Return at most ``limit`` characters of the text form of ``result``.
+
+    Dicts and lists are JSON-encoded only until the limit is reached, so a
+    huge result is never turned into one big string.
+    """
+    if isinstance(result, str):
+        return result[:limit]
+    if isinstance(result, (dict, list)):
+        encoder = json.JSONEncoder(ensure_ascii=False, default=str)
+        pieces: List[str] = []
+        size = 0
+        for piece in encoder.iterencode(result):
+            pieces.append(piece)
+            size += len(piece)
+            if size >= limit:
+                break
+        return "".join(pieces)[:limit]
+    return str(result)[:limit]
+
+
+# Set once LLM API keys have been found. A missing key is re-checked on every
+# HookManager so keys exported later are still picked up.
+_api_keys_found = False
+
+
+def _has_llm_api_keys() -> bool:
+    """Return AgenticTool.has_any_api_keys(), remembering a positive answer."""
+    global _api_keys_found
+    if not _api_keys_found:
+        from .agentic_tool import AgenticTool
+
+        _api_keys_found = AgenticTool.has_any_api_keys()
+    return _api_keys_found
+
+
+def _dump_json_bytes(data: Any) -> bytes:
+    """
+    Encode ``data`` as indented UTF-8 JSON, using orjson when it is installed.
+
+    Data orjson rejects (e.g. integers wider than 64 bits) falls back to the
+    standard encoder.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            )
+        except TypeError:
+            pass
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """Write ``data`` to a raw file descriptor, bypassing Python's buffering."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+@functools.lru_cache(maxsize=1)
+def _ensure_compose_registered() -> bool:
+    """Register ComposeTool, which runs the hook tools, once per process."""
+    from .compose_tool import ComposeTool
+    from .tool_registry import register_external_tool
+
+    register_external_tool("ComposeTool", ComposeTool)
+    return True
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_hook_config_file(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse a hook config file; keyed by mtime so edits are picked up."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
 class HookRule:
     """
     Defines rules for when hooks should be triggered.
@@ -39,6 +212,8 @@ class HookRule:
         conditions (Dict[str, Any]): The condition specifications
     """
 
+    __slots__ = ("conditions", "_predicate", "only_tool_name")
+
     def __init__(self, conditions: Dict[str, Any]):
         """
         Initialize the hook rule with conditions.
@@ -48,6 +223,75 @@ class HookRule:
                 output_length, content_type, tool_type, etc.
         """
         self.conditions = conditions
+        self._predicate = self._compile(conditions)
+        # When the rule is decided by the tool name alone, the name it
+        # requires; lets HookManager drop the hook for every other tool
+        self.only_tool_name: Optional[str] = None
+        if (
+            "tool_name" in conditions
+            and "tool_type" not in conditions
+            and not (
+                isinstance(conditions.get("content_type"), str)
+                and conditions["content_type"] in _CONTENT_TYPES
+            )
+            and (
+                "output_length" not in conditions
+                or conditions["output_length"].get("operator", ">")
+                not in _LENGTH_OPERATORS
+            )
+        ):
+            self.only_tool_name = conditions["tool_name"]
+
+    @staticmethod
+    def _compile(conditions: Dict[str, Any]) -> _RulePredicate:
+        """
+        Build a single predicate for the conditions.
+
+        The checks keep their original precedence: output_length decides
+        when its operator is known; a matching content_type accepts and a
+        mismatching one defers to tool_type, then tool_name; with nothing
+        left to check the rule matches.
+        """
+        if "output_length" in conditions:
+            length_condition = conditions["output_length"]
+            compare = _LENGTH_OPERATORS.get(length_condition.get("operator", ">"))
+            if compare is not None:
+                threshold = length_condition.get("threshold", 5000)
+
+                def check_length(result, tool_name, context, meta):
+                    return compare(meta.length, threshold)
+
+                return check_length
+
+        fallback = _always_true
+        if "tool_type" in conditions:
+            expected_type = conditions["tool_type"]
+
+            def check_tool_type(result, tool_name, context, meta):
+                return context.get("tool_type", "") == expected_type
+
+            fallback = check_tool_type
+        elif "tool_name" in conditions:
+            expected_name = conditions["tool_name"]
+
+            def check_tool_name(result, tool_name, context, meta):
+                return tool_name == expected_name
+
+            fallback = check_tool_name
+
+        content_type = conditions.get("content_type")
+        content_class = (
+            _CONTENT_TYPES.get(content_type) if isinstance(content_type, str) else None
+        )
+        if content_class is None or fallback is _always_true:
+            return fallback
+
+        def check_content_type(result, tool_name, context, meta):
+            return isinstance(result, content_class) or fallback(
+                result, tool_name, context, meta
+            )
+
+        return check_content_type
 
     def evaluate(
         self,
@@ -55,6 +299,7 @@ class HookRule:
         tool_name: str,
         arguments: Dict[str, Any],
         context: Dict[str, Any],
+        meta: Optional[_ResultMeta] = None,
     ) -> bool:
         """
         Evaluate whether the rule conditions are met.
@@ -64,45 +309,15 @@ class HookRule:
             tool_name (str): Name of the tool that produced the output
             arguments (Dict[str, Any]): Arguments passed to the tool
             context (Dict[str, Any]): Additional context information
+            meta (Optional[_ResultMeta]): Cached facts about ``result``,
+                shared across the hooks evaluated for one output
 
         Returns
             bool: True if conditions are met, False otherwise
         """
-        # Evaluate output length conditions
-        if "output_length" in self.conditions:
-            result_str = str(result)
-            length_condition = self.conditions["output_length"]
-            threshold = length_condition.get("threshold", 5000)
-            operator = length_condition.get("operator", ">")
-
-            if operator == ">":
-                return len(result_str) > threshold
-            elif operator == ">=":
-                return len(result_str) >= threshold
-            elif operator == "<":
-                return len(result_str) < threshold
-            elif operator == "<=":
-                return len(result_str) <= threshold
-
-        # Evaluate content type conditions
-        if "content_type" in self.conditions:
-            content_type = self.conditions["content_type"]
-            if content_type == "json" and isinstance(result, dict):
-                return True
-            elif content_type == "text" and isinstance(result, str):
-                return True
-
-        # Evaluate tool type conditions
-        if "tool_type" in self.conditions:
-            tool_type = context.get("tool_type", "")
-            return tool_type == self.conditions["tool_type"]
-
-        # Evaluate tool name conditions
-        if "tool_name" in self.conditions:
-            return tool_name == self.conditions["tool_name"]
-
-        # If no specific conditions are met, return True for general rules
-        return True
+        if meta is None:
+            meta = _ResultMeta(result)
+        return self._predicate(result, tool_name, context, meta)
 
 
 class OutputHook:
@@ -123,8 +338,12 @@ class OutputHook:
         enabled (bool): Whether the hook is enabled
         priority (int): Hook priority (lower numbers execute first)
         rule (HookRule): Rule for when this hook should trigger
+        tool_names (Optional[frozenset]): Tools the hook is limited to,
+            from the ``tool_names`` config list; None when not set
     """
 
+    __slots__ = ("config", "name", "enabled", "priority", "rule", "tool_names")
+
     def __init__(self, config: Dict[str, Any]):
         """
         Initialize the output hook with configuration.
@@ -135,12 +354,15 @@ class OutputHook:
                 - enabled: Whether hook is active
                 - priority: Execution priority
                 - conditions: Trigger conditions
+                - tool_names: Optional list of tools the hook applies to
         """
         self.config = config
         self.name = config.get("name", "unnamed_hook")
         self.enabled = config.get("enabled", True)
         self.priority = config.get("priority", 1)
         self.rule = HookRule(config.get("conditions", {}))
+        tool_names = config.get("tool_names")
+        self.tool_names = frozenset(tool_names) if tool_names is not None else None
 
     def should_trigger(
         self,
@@ -148,6 +370,7 @@ class OutputHook:
         tool_name: str,
         arguments: Dict[str, Any],
         context: Dict[str, Any],
+        meta: Optional[_ResultMeta] = None,
     ) -> bool:
         """
         Determine if this hook should be triggered for the given output.
@@ -157,13 +380,14 @@ class OutputHook:
             tool_name (str): Name of the tool that produced the output
             arguments (Dict[str, Any]): Arguments passed to the tool
             context (Dict[str, Any]): Additional context information
+            meta (Optional[_ResultMeta]): Cached facts about ``result``
 
         Returns
             bool: True if hook should trigger, False otherwise
         """
         if not self.enabled:
             return False
-        return self.rule.evaluate(result, tool_name, arguments, context)
+        return self.rule.evaluate(result, tool_name, arguments, context, meta)
 
     def process(
         self,
@@ -192,6 +416,22 @@ class OutputHook:
         """
         raise NotImplementedError("Subclasses must implement process method")
 
+    def _process_with_meta(
+        self,
+        result: Any,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        context: Dict[str, Any],
+        meta: _ResultMeta,
+    ) -> Any:
+        """
+        Process the output given cached facts about it.
+
+        HookManager calls this instead of process() so hooks can reuse work
+        already done while evaluating rules; by default it calls process().
+        """
+        return self.process(result, tool_name, arguments, context)
+
 
 @dataclass
 class SummarizationHookConfig:
@@ -202,6 +442,7 @@ class SummarizationHookConfig:
     focus_areas: str = "key_findings_and_results"
     max_summary_length: int = 3000
     composer_timeout_sec: int = 60
+    composer_max_workers: int = 4
 
     def validate(self) -> "SummarizationHookConfig":
         # Validate numeric fields; clamp to sensible defaults if invalid
@@ -214,6 +455,11 @@ class SummarizationHookConfig:
             or self.composer_timeout_sec <= 0
         ):
             self.composer_timeout_sec = 60
+        if (
+            not isinstance(self.composer_max_workers, int)
+            or self.composer_max_workers <= 0
+        ):
+            self.composer_max_workers = 4
         if not isinstance(self.composer_tool, str) or not self.composer_tool:
             self.composer_tool = "OutputSummarizationComposer"
         return self
@@ -227,6 +473,13 @@ class SummarizationHook(OutputHook):
     to provide intelligent summarization of long tool outputs. It supports
     chunking large outputs, processing each chunk with AI, and merging results.
 
+    Composer calls run on a worker pool of ``composer_max_workers`` threads,
+    shared by hooks with the same setting. A call waits for a free worker,
+    and both the wait and the composer call count towards
+    ``composer_timeout_sec``. A call that times out keeps its worker until
+    the composer returns; if no worker frees up in time, the original
+    output is returned unsummarized.
+
     Args:
         config (Dict[str, Any]): Hook configuration including summarization parameters
         tooluniverse: Reference to the ToolUniverse instance
@@ -237,8 +490,48 @@ class SummarizationHook(OutputHook):
         chunk_size (int): Size of chunks for processing large outputs
         focus_areas (str): Areas to focus on during summarization
         max_summary_length (int): Maximum length of final summary
+        composer_timeout_sec (int): Seconds to wait for a summary
+        composer_max_workers (int): Size of the composer worker pool
     """
 
+    __slots__ = (
+        "tooluniverse",
+        "config_obj",
+        "composer_tool",
+        "chunk_size",
+        "focus_areas",
+        "max_summary_length",
+        "composer_timeout_sec",
+        "composer_max_workers",
+        "_composer_available",
+    )
+
+    # Worker threads for composer calls, one pool per worker count, created
+    # on first use so each summarization does not spawn and join a thread.
+    # Each pool has one semaphore slot per worker, held until the composer
+    # call really finishes, so calls never queue behind stuck workers.
+    _executors: ClassVar[
+        Dict[int, Tuple[ThreadPoolExecutor, threading.BoundedSemaphore]]
+    ] = {}
+    _executor_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    @classmethod
+    def _get_executor(
+        cls, max_workers: int
+    ) -> Tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+        pool = cls._executors.get(max_workers)
+        if pool is None:
+            with cls._executor_lock:
+                pool = cls._executors.get(max_workers)
+                if pool is None:
+                    executor = ThreadPoolExecutor(
+                        max_workers=max_workers, thread_name_prefix="summarize-hook"
+                    )
+                    atexit.register(executor.shutdown, wait=False)
+                    pool = (executor, threading.BoundedSemaphore(max_workers))
+                    cls._executors[max_workers] = pool
+        return pool
+
     def __init__(self, config: Dict[str, Any] | SummarizationHookConfig, tooluniverse):
         """
         Initialize the summarization hook.
@@ -261,6 +554,7 @@ class SummarizationHook(OutputHook):
                 focus_areas=raw.get("focus_areas", "key_findings_and_results"),
                 max_summary_length=raw.get("max_summary_length", 3000),
                 composer_timeout_sec=raw.get("composer_timeout_sec", 60),
+                composer_max_workers=raw.get("composer_max_workers", 4),
             )
         self.config_obj = cfg.validate()
         self.composer_tool = self.config_obj.composer_tool
@@ -268,6 +562,9 @@ class SummarizationHook(OutputHook):
         self.focus_areas = self.config_obj.focus_areas
         self.max_summary_length = self.config_obj.max_summary_length
         self.composer_timeout_sec = self.config_obj.composer_timeout_sec
+        self.composer_max_workers = self.config_obj.composer_max_workers
+        # Set once the composer tool has been seen; tools stay registered
+        self._composer_available = False
 
     def process(
         self,
@@ -275,6 +572,7 @@ class SummarizationHook(OutputHook):
         tool_name: Optional[str] = None,
         arguments: Optional[Dict[str, Any]] = None,
         context: Optional[Dict[str, Any]] = None,
+        meta: Optional[_ResultMeta] = None,
     ) -> Any:
         """
         Execute summarization processing using Compose Summarizer Tool.
@@ -289,6 +587,8 @@ class SummarizationHook(OutputHook):
             tool_name (str): Name of the tool that produced the output
             arguments (Dict[str, Any]): Arguments passed to the tool
             context (Dict[str, Any]): Additional context information
+            meta (Optional[_ResultMeta]): Cached facts about ``result``; its
+                string form is reused when already computed
 
         Returns
             Any: The summarized output, or original output if summarization fails
@@ -306,32 +606,35 @@ class SummarizationHook(OutputHook):
                 return None
             if isinstance(result, str) and result == "":
                 return ""
-            # Debug: basic context
-            try:
-                _len = len(str(result))
-            except Exception:
-                _len = -1
+            # Check if the required tools are available before paying for
+            # stringifying the result
+            if not self._composer_available:
+                tu = self.tooluniverse
+                if (
+                    self.composer_tool not in tu.callable_functions
+                    and self.composer_tool not in tu.all_tool_dict
+                ):
+                    _logger.warning(
+                        "Summarization tool '%s' not available; "
+                        "returning original output",
+                        self.composer_tool,
+                    )
+                    return result
+                self._composer_available = True
+
+            # Stringify once for both the debug log and the composer input
+            result_str = meta.str_value if meta is not None else str(result)
             _logger.debug(
                 "SummarizationHook process: tool=%s, result_len=%s, chunk_size=%s, max_summary_length=%s",
                 tool_name,
-                _len,
+                len(result_str),
                 self.chunk_size,
                 self.max_summary_length,
             )
-            # Check if the required tools are available
-            if (
-                self.composer_tool not in self.tooluniverse.callable_functions
-                and self.composer_tool not in self.tooluniverse.all_tool_dict
-            ):
-                _logger.warning(
-                    "Summarization tool '%s' not available; returning original output",
-                    self.composer_tool,
-                )
-                return result
 
             # Prepare parameters for Compose Summarizer Tool
             composer_args = {
-                "tool_output": str(result),
+                "tool_output": result_str,
                 "query_context": self._extract_query_context(context),
                 "tool_name": tool_name,
                 "chunk_size": self.chunk_size,
@@ -347,18 +650,30 @@ class SummarizationHook(OutputHook):
             )
             # Run composer with timeout to avoid hangs
             try:
-                from concurrent.futures import (
-                    ThreadPoolExecutor,
-                )
 
                 def _call_composer():
                     return self.tooluniverse.run_one_function(
                         {"name": self.composer_tool, "arguments": composer_args}
                     )
 
-                with ThreadPoolExecutor(max_workers=1) as _pool:
-                    _future = _pool.submit(_call_composer)
-                    composer_result = _future.result(timeout=self.composer_timeout_sec)
+                deadline = time.monotonic() + self.composer_timeout_sec
+                executor, slots = self._get_executor(self.composer_max_workers)
+                if not slots.acquire(timeout=self.composer_timeout_sec):
+                    _logger.warning(
+                        "No summarization worker freed up within %ss; "
+                        "returning original output",
+                        self.composer_timeout_sec,
+                    )
+                    return result
+                try:
+                    _future = executor.submit(_call_composer)
+                except BaseException:
+                    slots.release()
+                    raise
+                _future.add_done_callback(lambda _f: slots.release())
+                composer_result = _future.result(
+                    timeout=max(0.0, deadline - time.monotonic())
+                )
             except Exception as _e_timeout:
                 # Timeout or execution error; log and fall back to original output
                 _logger.warning("Composer execution failed/timeout: %s", _e_timeout)
@@ -398,6 +713,16 @@ class SummarizationHook(OutputHook):
                 )
             return result
 
+    def _process_with_meta(
+        self,
+        result: Any,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        context: Dict[str, Any],
+        meta: _ResultMeta,
+    ) -> Any:
+        return self.process(result, tool_name, arguments, context, meta)
+
     def _extract_query_context(self, context: Dict[str, Any]) -> str:
         """
         Extract query context from execution context.
@@ -413,9 +738,7 @@ class SummarizationHook(OutputHook):
         """
         arguments = context.get("arguments", {})
 
-        # Common query parameter names
-        query_keys = ["query", "question", "input", "text", "search_term", "prompt"]
-        for key in query_keys:
+        for key in _QUERY_KEYS:
             if key in arguments:
                 return str(arguments[key])
 
@@ -454,11 +777,24 @@ class HookManager:
         self.config = config
         self.tooluniverse = tooluniverse
         self.hooks: List[OutputHook] = []
+        # Name index over self.hooks; the list keeps the priority order
+        self._hooks_by_name: Dict[str, OutputHook] = {}
+        # self.hooks in priority order; rebuilt after the hook set changes
+        self._sorted_hooks: Optional[Tuple[OutputHook, ...]] = None
+        # Tool name -> sorted hooks applicable to it; cleared with the above
+        self._applicable_hooks: Dict[str, Tuple[OutputHook, ...]] = {}
         self.enabled = True
         # Alias for tests that expect hooks_enabled flag
         self.hooks_enabled = self.enabled
         self.config_path = config.get("config_path", "template/hook_config.json")
         self._pending_tools_to_load: List[str] = []
+        # Extended with any custom composer tools named by the hook configs
+        self._hook_tool_names = _HOOK_TOOL_NAMES
+        # Set once every hook tool is instantiated, so the per-call
+        # _ensure_hook_tools_loaded check becomes a no-op
+        self._hook_tools_ready = False
+        # Hook type -> default hook_config values; rebuilt by _load_hooks
+        self._type_defaults: Dict[str, Mapping[str, Any]] = {}
         self._load_hook_config()
 
         # Validate LLM API keys before loading hooks
@@ -522,7 +858,7 @@ class HookManager:
         Returns
             Any: The processed output after applying all applicable hooks
         """
-        if not self.enabled:
+        if not self.enabled or not self.hooks:
             return result
 
         # Load pending tools if ToolUniverse is now ready
@@ -532,23 +868,44 @@ class HookManager:
         if self._is_hook_tool(tool_name):
             return result
 
-        # Sort hooks by priority (lower numbers execute first)
-        sorted_hooks = sorted(self.hooks, key=lambda h: h.priority)
+        # Hooks applicable to this tool, in priority order (lower numbers
+        # execute first); applicability depends only on the tool name
+        applicable = self._applicable_hooks.get(tool_name)
+        if applicable is None:
+            if self._sorted_hooks is None:
+                self._sorted_hooks = tuple(
+                    sorted(self.hooks, key=operator.attrgetter("priority"))
+                )
+            applicable = tuple(
+                hook
+                for hook in self._sorted_hooks
+                if self._is_hook_applicable(hook, tool_name, context)
+                and hook.rule.only_tool_name in (None, tool_name)
+            )
+            self._applicable_hooks[tool_name] = applicable
 
-        for hook in sorted_hooks:
+        # Shared by all rules until a hook replaces the result
+        meta = _ResultMeta(result)
+        for hook in applicable:
             if not hook.enabled:
                 continue
 
-            # Check if hook is applicable to current tool
-            if self._is_hook_applicable(hook, tool_name, context):
-                if hook.should_trigger(result, tool_name, arguments, context):
-                    _logger.debug(
-                        "Applying hook: %s for tool: %s", hook.name, tool_name
-                    )
-                    result = hook.process(result, tool_name, arguments, context)
+            if hook.should_trigger(result, tool_name, arguments, context, meta):
+                _logger.debug("Applying hook: %s for tool: %s", hook.name, tool_name)
+                result = hook._process_with_meta(
+                    result, tool_name, arguments, context, meta
+                )
+                if result is not meta.result:
+                    meta = _ResultMeta(result)
 
         return result
 
+    @staticmethod
+    def invalidate_api_key_cache():
+        """Forget that API keys were found, e.g. after changing the environment."""
+        global _api_keys_found
+        _api_keys_found = False
+
     def _validate_llm_api_keys(self) -> bool:
         """
         Validate that LLM API keys are available for hook tools.
@@ -556,9 +913,7 @@ class HookManager:
         Returns
             bool: True if API keys are available, False otherwise
         """
-        from .agentic_tool import AgenticTool
-
-        if AgenticTool.has_any_api_keys():
+        if _has_llm_api_keys():
             _logger.debug("LLM API keys validated successfully")
             return True
         else:
@@ -611,6 +966,7 @@ class HookManager:
         """Enable hooks and (re)load configurations and required tools."""
         self.toggle_hooks(True)
         # Ensure tools and hooks are ready
+        self._hook_tools_ready = False
         self._ensure_hook_tools_loaded()
         self._load_hooks()
 
@@ -619,6 +975,9 @@ class HookManager:
         self.toggle_hooks(False)
         # Do not destroy config; just clear active hooks
         self.hooks = []
+        self._hooks_by_name = {}
+        self._sorted_hooks = None
+        self._applicable_hooks = {}
 
     def reload_config(self, config_path: Optional[str] = None):
         """
@@ -644,10 +1003,7 @@ class HookManager:
         Returns
             Optional[OutputHook]: Hook instance if found, None otherwise
         """
-        for hook in self.hooks:
-            if hook.name == hook_name:
-                return hook
-        return None
+        return self._hooks_by_name.get(hook_name)
 
     def _load_hook_config(self):
         """
@@ -668,6 +1024,18 @@ class HookManager:
         try:
             config_file = self._get_config_file_path()
 
+            try:
+                mtime_ns = os.stat(config_file).st_mtime_ns
+            except (OSError, TypeError):
+                # Not a plain file (e.g. a zipped package resource)
+                mtime_ns = None
+            if mtime_ns is not None:
+                # Copy the cached parse: hook loading mutates config entries
+                self.config = copy.deepcopy(
+                    _parse_hook_config_file(os.fspath(config_file), mtime_ns)
+                )
+                return
+
             if hasattr(config_file, "read_text"):
                 content = config_file.read_text(encoding="utf-8")
             else:
@@ -710,7 +1078,11 @@ class HookManager:
         hook instances for global, tool-specific, and category-specific hooks.
         It also automatically loads any tools required by the hooks.
         """
+        self._type_defaults.clear()
         self.hooks = []
+        self._hooks_by_name = {}
+        self._sorted_hooks = None
+        self._applicable_hooks = {}
 
         # Collect all hook configs first to determine required tools
         all_hook_configs = []
@@ -726,8 +1098,7 @@ class HookManager:
             if tool_hook_config.get("enabled", True):
                 tool_hooks = tool_hook_config.get("hooks", [])
                 for hook_config in tool_hooks:
-                    hook_config["tool_name"] = tool_name
-                    all_hook_configs.append(hook_config)
+                    all_hook_configs.append({**hook_config, "tool_name": tool_name})
 
         # Load category-specific hooks
         category_hooks = self.config.get("category_hooks", {})
@@ -735,8 +1106,7 @@ class HookManager:
             if category_hook_config.get("enabled", True):
                 category_hooks_list = category_hook_config.get("hooks", [])
                 for hook_config in category_hooks_list:
-                    hook_config["category"] = category_name
-                    all_hook_configs.append(hook_config)
+                    all_hook_configs.append({**hook_config, "category": category_name})
 
         # Auto-load required tools for hooks
         self._auto_load_hook_tools(all_hook_configs)
@@ -749,6 +1119,8 @@ class HookManager:
             hook = self._create_hook_instance(hook_config)
             if hook:
                 self.hooks.append(hook)
+                # First hook with a name wins, as with the former linear scan
+                self._hooks_by_name.setdefault(hook.name, hook)
 
     def _auto_load_hook_tools(self, hook_configs: List[Dict[str, Any]]):
         """
@@ -760,49 +1132,32 @@ class HookManager:
         Args:
             hook_configs (List[Dict[str, Any]]): List of hook configurations
         """
-        required_tools = set()
-
-        for hook_config in hook_configs:
-            hook_type = hook_config.get("type", "SummarizationHook")
-            hook_config_section = hook_config.get("hook_config", {})
-
-            # Determine required tools based on hook type
-            if hook_type == "SummarizationHook":
-                composer_tool = hook_config_section.get(
+        # Only summarization hooks need tools: their composer and the
+        # agentic summarizer it calls
+        required_tools = {
+            tool
+            for hook_config in hook_configs
+            if hook_config.get("type", "SummarizationHook") == "SummarizationHook"
+            for tool in (
+                hook_config.get("hook_config", {}).get(
                     "composer_tool", "OutputSummarizationComposer"
-                )
-                required_tools.add(composer_tool)
-                # Also need the agentic tool for summarization
-                required_tools.add("ToolOutputSummarizer")
-            elif hook_type == "FilteringHook":
-                # Add filtering-related tools if any
-                pass
-            elif hook_type == "FormattingHook":
-                # Add formatting-related tools if any
-                pass
-            elif hook_type == "ValidationHook":
-                # Add validation-related tools if any
-                pass
-            elif hook_type == "LoggingHook":
-                # Add logging-related tools if any
-                pass
+                ),
+                "ToolOutputSummarizer",
+            )
+        }
+
+        self._hook_tool_names = self._hook_tool_names.union(required_tools)
 
         # Load required tools
         if required_tools:
-            tools_to_load = []
-            for tool in required_tools:
-                # Map tool names to their categories
-                if tool in ["OutputSummarizationComposer", "ToolOutputSummarizer"]:
-                    tools_to_load.append("output_summarization")
-                # Add more mappings as needed
+            # Map tool names to their categories
+            tools_to_load = (
+                ["output_summarization"] if required_tools & _HOOK_TOOL_NAMES else []
+            )
 
             if tools_to_load:
                 try:
-                    # Ensure ComposeTool is available
-                    from .compose_tool import ComposeTool
-                    from .tool_registry import register_external_tool
-
-                    register_external_tool("ComposeTool", ComposeTool)
+                    _ensure_compose_registered()
 
                     # Check if ToolUniverse is fully initialized
                     if hasattr(self.tooluniverse, "all_tools"):
@@ -810,13 +1165,7 @@ class HookManager:
                         self.tooluniverse.load_tools(tools_to_load)
 
                         # Verify that the required tools are actually available
-                        missing_tools = []
-                        for tool in required_tools:
-                            if (
-                                tool not in self.tooluniverse.callable_functions
-                                and tool not in self.tooluniverse.all_tool_dict
-                            ):
-                                missing_tools.append(tool)
+                        missing_tools = self._missing_hook_tools(required_tools)
 
                         if missing_tools:
                             _logger.warning(
@@ -846,12 +1195,10 @@ class HookManager:
         This method is called during HookManager initialization to make sure that
         the necessary tools (like output_summarization tools) are available.
         """
+        if self._hook_tools_ready:
+            return
         try:
-            # Ensure ComposeTool is available
-            from .compose_tool import ComposeTool
-            from .tool_registry import register_external_tool
-
-            register_external_tool("ComposeTool", ComposeTool)
+            _ensure_compose_registered()
 
             # Load output_summarization tools if not already loaded
             if (
@@ -862,7 +1209,7 @@ class HookManager:
                 self.tooluniverse.load_tools(["output_summarization"])
 
             # Pre-instantiate hook tools to ensure they're available in callable_functions
-            required_tools = ["ToolOutputSummarizer", "OutputSummarizationComposer"]
+            required_tools = _HOOK_TOOLS
             for tool_name in required_tools:
                 if (
                     tool_name in self.tooluniverse.all_tool_dict
@@ -880,15 +1227,7 @@ class HookManager:
                         )
 
             # Verify the tools were loaded
-            missing_tools = []
-            for tool in required_tools:
-                if (
-                    hasattr(self.tooluniverse, "callable_functions")
-                    and tool not in self.tooluniverse.callable_functions
-                    and hasattr(self.tooluniverse, "all_tool_dict")
-                    and tool not in self.tooluniverse.all_tool_dict
-                ):
-                    missing_tools.append(tool)
+            missing_tools = self._missing_hook_tools(required_tools)
 
             if missing_tools:
                 _logger.warning(
@@ -897,11 +1236,33 @@ class HookManager:
                 _logger.info("This may cause summarization hooks to fail")
             else:
                 _logger.info("Hook tools loaded successfully: %s", required_tools)
+                self._hook_tools_ready = all(
+                    tool in self.tooluniverse.callable_functions
+                    for tool in required_tools
+                )
 
         except Exception as e:
             _logger.error("Error loading hook tools: %s", e)
             _logger.info("This will cause summarization hooks to fail")
 
+    def _missing_hook_tools(self, required_tools) -> List[str]:
+        """
+        Return the required tools that ToolUniverse neither has instantiated
+        nor knows the configuration of.
+
+        Both registries are dicts, so each check is a hash lookup; nothing is
+        copied even when thousands of tools are registered.
+        """
+        callable_functions = getattr(self.tooluniverse, "callable_functions", None)
+        all_tool_dict = getattr(self.tooluniverse, "all_tool_dict", None)
+        if callable_functions is None or all_tool_dict is None:
+            return []
+        return [
+            tool
+            for tool in required_tools
+            if tool not in callable_functions and tool not in all_tool_dict
+        ]
+
     def _load_pending_tools(self):
         """
         Load any pending tools that were queued during initialization.
@@ -910,13 +1271,21 @@ class HookManager:
         that couldn't be loaded during HookManager initialization are loaded
         once the ToolUniverse is fully ready.
         """
+        if self._hook_tools_ready and not self._pending_tools_to_load:
+            return
+
         if self._pending_tools_to_load and hasattr(self.tooluniverse, "all_tools"):
+            # Fold the output_summarization category into the same call so
+            # _ensure_hook_tools_loaded does not issue a second load_tools
+            needed = list(dict.fromkeys(self._pending_tools_to_load))
+            if "output_summarization" not in needed and (
+                "output_summarization"
+                not in getattr(self.tooluniverse, "tool_category_dicts", {})
+            ):
+                needed.append("output_summarization")
             try:
-                self.tooluniverse.load_tools(self._pending_tools_to_load)
-                _logger.info(
-                    "Loaded pending hook tools: %s",
-                    ", ".join(self._pending_tools_to_load),
-                )
+                self.tooluniverse.load_tools(needed)
+                _logger.info("Loaded pending hook tools: %s", ", ".join(needed))
                 self._pending_tools_to_load = []  # Clear the pending list
             except Exception as e:
                 _logger.warning("Could not load pending hook tools: %s", e)
@@ -937,12 +1306,7 @@ class HookManager:
         Returns
             bool: True if the tool is a hook tool and should be excluded from hook processing
         """
-        hook_tool_names = [
-            "ToolOutputSummarizer",
-            "OutputSummarizationComposer",
-            # Add more hook tool names as needed
-        ]
-        return tool_name in hook_tool_names
+        return tool_name in self._hook_tool_names
 
     def _create_hook_instance(
         self, hook_config: Dict[str, Any]
@@ -975,36 +1339,28 @@ class HookManager:
             _logger.error("Unknown hook type: %s", hook_type)
             return None
 
-    def _apply_hook_type_defaults(self, hook_config: Dict[str, Any]) -> Dict[str, Any]:
+    def _get_type_defaults(self, hook_type: str) -> Mapping[str, Any]:
         """
-        Apply hook type-specific default values to hook configuration.
+        Return the default hook_config values for a hook type.
 
-        This method merges hook type defaults with individual hook configuration,
-        ensuring that each hook type gets its appropriate default values.
+        Built once per hook type from the hook_type_defaults configuration and
+        reused for every hook of that type until the hooks are reloaded.
 
         Args:
-            hook_config (Dict[str, Any]): Original hook configuration
+            hook_type (str): Hook type name, e.g. "SummarizationHook"
 
         Returns
-            Dict[str, Any]: Enhanced configuration with defaults applied
+            Mapping[str, Any]: Read-only default values
         """
-        hook_type = hook_config.get("type", "SummarizationHook")
+        defaults = self._type_defaults.get(hook_type)
+        if defaults is not None:
+            return defaults
 
         # Get hook type defaults from configuration
         hook_type_defaults = self.config.get("hook_type_defaults", {}).get(
             hook_type, {}
         )
 
-        # Create enhanced configuration
-        enhanced_config = hook_config.copy()
-
-        # Apply defaults to hook_config if not already specified
-        if "hook_config" not in enhanced_config:
-            enhanced_config["hook_config"] = {}
-
-        hook_config_section = enhanced_config["hook_config"]
-
-        # Apply defaults for each hook type
         if hook_type == "SummarizationHook":
             defaults = {
                 "composer_tool": "OutputSummarizationComposer",
@@ -1034,10 +1390,33 @@ class HookManager:
         else:
             defaults = {}
 
-        # Apply defaults only if not already specified
-        for key, default_value in defaults.items():
-            if key not in hook_config_section:
-                hook_config_section[key] = default_value
+        # Shared by every hook of this type, so hand out a read-only view
+        defaults = MappingProxyType(defaults)
+        self._type_defaults[hook_type] = defaults
+        return defaults
+
+    def _apply_hook_type_defaults(self, hook_config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Apply hook type-specific default values to hook configuration.
+
+        This method merges hook type defaults with individual hook configuration,
+        ensuring that each hook type gets its appropriate default values.
+
+        Args:
+            hook_config (Dict[str, Any]): Original hook configuration
+
+        Returns
+            Dict[str, Any]: Enhanced configuration with defaults applied
+        """
+        hook_type = hook_config.get("type", "SummarizationHook")
+
+        # Create enhanced configuration; build a new nested section so the
+        # defaults do not leak into self.config. Explicit values win.
+        enhanced_config = hook_config.copy()
+        enhanced_config["hook_config"] = {
+            **self._get_type_defaults(hook_type),
+            **enhanced_config.get("hook_config", {}),
+        }
 
         return enhanced_config
 
@@ -1055,6 +1434,11 @@ class HookManager:
         Returns
             bool: True if hook is applicable, False otherwise
         """
+        # Hooks limited to a set of tools
+        tool_names = getattr(hook, "tool_names", None)
+        if tool_names is not None:
+            return tool_name in tool_names
+
         # Check tool-specific hooks
         if "tool_name" in hook.config:
             return hook.config["tool_name"] == tool_name
@@ -1086,6 +1470,14 @@ class FileSaveHook(OutputHook):
     - cleanup_age_hours: Age in hours for auto cleanup (default: 24)
     """
 
+    __slots__ = (
+        "temp_dir",
+        "file_prefix",
+        "include_metadata",
+        "auto_cleanup",
+        "cleanup_age_hours",
+    )
+
     def __init__(self, config: Dict[str, Any]):
         """
         Initialize the FileSaveHook.
@@ -1108,19 +1500,9 @@ class FileSaveHook(OutputHook):
         self.auto_cleanup = config.get("auto_cleanup", False)
         self.cleanup_age_hours = config.get("cleanup_age_hours", 24)
 
-        # Import required modules
-        import tempfile
-        import os
-        from datetime import datetime, timedelta
-
-        self.tempfile = tempfile
-        self.os = os
-        self.datetime = datetime
-        self.timedelta = timedelta
-
         # Create temp directory if specified
         if self.temp_dir:
-            self.os.makedirs(self.temp_dir, exist_ok=True)
+            os.makedirs(self.temp_dir, exist_ok=True)
 
     def process(
         self,
@@ -1151,25 +1533,36 @@ class FileSaveHook(OutputHook):
             # Determine data format and structure
             data_format, data_structure = self._analyze_data(result)
 
+            # One clock read serves the filename and both timestamps
+            now = datetime.now()
+            now_iso = now.isoformat()
+
             # Generate filename
-            timestamp = self.datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = now.strftime("%Y%m%d_%H%M%S")
             filename = f"{self.file_prefix}_{tool_name}_{timestamp}.{data_format}"
 
+            payload = self._encode_data(result, data_format)
+
             # Save to temporary file
             if self.temp_dir:
-                file_path = self.os.path.join(self.temp_dir, filename)
+                file_path = os.path.join(self.temp_dir, filename)
+                # Private like the mkstemp files below
+                fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
             else:
-                # Use system temp directory
-                temp_fd, file_path = self.tempfile.mkstemp(
+                # Use system temp directory; tempfile is only needed here
+                import tempfile
+
+                # Write through the descriptor mkstemp opened instead of
+                # reopening the path
+                fd, file_path = tempfile.mkstemp(
                     suffix=f"_{filename}", prefix=self.file_prefix, dir=self.temp_dir
                 )
-                self.os.close(temp_fd)
-
-            # Write data to file
-            self._write_data_to_file(result, file_path, data_format)
+            try:
+                _write_all(fd, payload)
+            finally:
+                os.close(fd)
 
-            # Get file size
-            file_size = self.os.path.getsize(file_path)
+            file_size = len(payload)
 
             # Prepare response
             response = {
@@ -1177,7 +1570,7 @@ class FileSaveHook(OutputHook):
                 "data_format": data_format,
                 "data_structure": data_structure,
                 "file_size": file_size,
-                "created_at": self.datetime.now().isoformat(),
+                "created_at": now_iso,
                 "tool_name": tool_name,
                 "original_arguments": arguments,
             }
@@ -1187,7 +1580,7 @@ class FileSaveHook(OutputHook):
                 response["metadata"] = {
                     "hook_name": self.name,
                     "hook_type": "FileSaveHook",
-                    "processing_time": self.datetime.now().isoformat(),
+                    "processing_time": now_iso,
                     "context": context,
                 }
 
@@ -1198,10 +1591,15 @@ class FileSaveHook(OutputHook):
             return response
 
         except Exception as e:
-            # Return error information instead of failing
+            # Return error information instead of failing; only a bounded
+            # preview of a possibly huge result is included
             return {
                 "error": f"Failed to save output to file: {str(e)}",
-                "original_output": str(result),
+                "original_output": _output_preview(result),
+                "original_output_type": type(result).__name__,
+                "original_output_size": (
+                    len(result) if hasattr(result, "__len__") else None
+                ),
                 "tool_name": tool_name,
                 "hook_name": self.name,
             }
@@ -1216,41 +1614,31 @@ class FileSaveHook(OutputHook):
         Returns
             tuple[str, str]: (data_format, data_structure)
         """
-        if isinstance(data, dict):
-            return "json", f"dict with {len(data)} keys"
-        elif isinstance(data, list):
-            return "json", f"list with {len(data)} items"
-        elif isinstance(data, str):
-            if data.strip().startswith("{") or data.strip().startswith("["):
-                return "json", "JSON string"
-            else:
-                return "txt", f"text with {len(data)} characters"
-        elif isinstance(data, (int, float)):
-            return "json", "numeric value"
-        elif isinstance(data, bool):
-            return "json", "boolean value"
-        else:
-            return "bin", f"binary data of type {type(data).__name__}"
+        analyzer = _DATA_ANALYZERS.get(type(data))
+        if analyzer is None:
+            # Subclasses such as OrderedDict miss the exact-type lookup
+            analyzer = next(
+                (a for t, a in _DATA_ANALYZERS.items() if isinstance(data, t)), None
+            )
+        if analyzer is not None:
+            return analyzer(data)
+        return "bin", f"binary data of type {type(data).__name__}"
 
-    def _write_data_to_file(self, data: Any, file_path: str, data_format: str) -> None:
+    def _encode_data(self, data: Any, data_format: str) -> bytes:
         """
-        Write data to file in the appropriate format.
+        Encode data as the bytes to save in the appropriate format.
 
         Args:
-            data (Any): The data to write
-            file_path (str): Path to the file
+            data (Any): The data to encode
             data_format (str): Format of the data
+
+        Returns
+            bytes: The file contents
         """
         if data_format == "json":
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        elif data_format == "txt":
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(str(data))
-        else:
-            # For binary or other formats, write as string
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(str(data))
+            return _dump_json_bytes(data)
+        # Text, binary and other formats are all written as their string form
+        return str(data).encode("utf-8")
 
     def _cleanup_old_files(self) -> None:
         """
@@ -1260,18 +1648,19 @@ class FileSaveHook(OutputHook):
             return
 
         try:
-            current_time = self.datetime.now()
-            cutoff_time = current_time - self.timedelta(hours=self.cleanup_age_hours)
-
-            for filename in self.os.listdir(self.temp_dir):
-                if filename.startswith(self.file_prefix):
-                    file_path = self.os.path.join(self.temp_dir, filename)
-                    file_time = self.datetime.fromtimestamp(
-                        self.os.path.getmtime(file_path)
-                    )
-
-                    if file_time < cutoff_time:
-                        self.os.remove(file_path)
+            cutoff = (
+                datetime.now() - timedelta(hours=self.cleanup_age_hours)
+            ).timestamp()
+
+            # scandir entries carry their own stat data, so no extra getmtime
+            with os.scandir(self.temp_dir) as entries:
+                for entry in entries:
+                    if (
+                        entry.name.startswith(self.file_prefix)
+                        and entry.is_file(follow_symlinks=False)
+                        and entry.stat(follow_symlinks=False).st_mtime < cutoff
+                    ):
+                        os.remove(entry.path)
 
         except Exception as e:
             # Log error but don't fail the hook
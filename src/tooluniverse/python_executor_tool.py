@@ -7,19 +7,121 @@ This module provides two specialized tools for executing Python code:
 """
 
 import ast
+import builtins
+import functools
+import importlib.util
 import io
 import os
 import signal
 import subprocess
 import sys
+import threading
 import time
 import traceback
-from typing import Any, Dict, List, Optional
+from collections import deque
+from types import CodeType
+from typing import Any, Dict, List, Optional, Tuple
 
 from .base_tool import BaseTool
 from .tool_registry import register_tool
 
 
+# Most output kept per stream from a script run; older output is dropped
+_MAX_SCRIPT_OUTPUT_BYTES = 16 * 1024 * 1024
+
+# How long output readers may take to finish after a timed-out script is killed
+_READER_GRACE_SECONDS = 1.0
+
+
+class _OutputTail:
+    """Keep the last ``limit`` bytes read from a pipe."""
+
+    def __init__(self, limit: int = _MAX_SCRIPT_OUTPUT_BYTES):
+        self.limit = limit
+        self.chunks: deque = deque()
+        self.size = 0
+        self.truncated = False
+
+    def drain(self, stream) -> None:
+        """Read ``stream`` to EOF; meant to run on its own thread."""
+        with stream:
+            for chunk in iter(lambda: stream.read(1 << 16), b""):
+                self.chunks.append(chunk)
+                self.size += len(chunk)
+                while self.size - len(self.chunks[0]) >= self.limit:
+                    self.size -= len(self.chunks.popleft())
+                    self.truncated = True
+
+    def text(self) -> str:
+        """Decode the kept bytes once, with universal newlines like text mode."""
+        data = b"".join(self.chunks)
+        if len(data) > self.limit:
+            data = data[-self.limit :]
+            self.truncated = True
+        text = data.decode("utf-8", "replace")
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        if self.truncated:
+            return "[earlier output truncated]\n" + text
+        return text
+
+
+def _module_available(name: str) -> bool:
+    """Check whether ``name`` can be imported without executing the module."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        # Missing parent package, or an empty or invalid name
+        return False
+
+
+@functools.lru_cache(maxsize=512)
+def _compile_code(code: str) -> CodeType:
+    """Compile a snippet once; agents often resubmit the same code."""
+    return compile(code, "<string>", "exec")
+
+
+class _SafetyVisitor(ast.NodeVisitor):
+    """Collect a warning for each forbidden import, call or attribute."""
+
+    def __init__(self, forbidden: Dict[str, frozenset], allowed_modules: frozenset):
+        # Forbidden unless explicitly allowed, resolved once per check
+        self.forbidden_imports = forbidden["Import"] - allowed_modules
+        self.forbidden_calls = forbidden["Call"]
+        self.forbidden_attributes = forbidden["Attribute"]
+        self.warnings: List[str] = []
+
+    def _check_import(self, name: str) -> None:
+        # Submodules such as os.path or urllib.request count as their package
+        if name.split(".")[0] in self.forbidden_imports:
+            self.warnings.append(f"Forbidden import: {name}")
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            self._check_import(alias.name)
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        # "from os import path" is as dangerous as "import os"
+        if node.module and not node.level:
+            self._check_import(node.module)
+        self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call) -> None:
+        func = node.func
+        if isinstance(func, ast.Name):
+            if func.id in self.forbidden_calls:
+                self.warnings.append(f"Forbidden function call: {func.id}")
+        elif isinstance(func, ast.Attribute):
+            if func.attr in self.forbidden_calls:
+                self.warnings.append(f"Forbidden method call: {func.attr}")
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if node.attr in self.forbidden_attributes:
+            self.warnings.append(f"Forbidden attribute access: {node.attr}")
+        self.generic_visit(node)
+
+
 class BasePythonExecutor:
     """Base class for Python execution tools with shared security features."""
 
@@ -77,11 +179,19 @@ class BasePythonExecutor:
 
     # Forbidden AST node types and their dangerous attributes
     FORBIDDEN_AST_NODES = {
-        "Import": ["os", "sys", "subprocess", "socket", "urllib", "requests", "http"],
-        "Call": ["open", "eval", "exec", "compile", "__import__", "input", "raw_input"],
-        "Attribute": ["__import__", "open", "file"],
+        "Import": frozenset(
+            {"os", "sys", "subprocess", "socket", "urllib", "requests", "http"}
+        ),
+        "Call": frozenset(
+            {"open", "eval", "exec", "compile", "__import__", "input", "raw_input"}
+        ),
+        "Attribute": frozenset({"__import__", "open", "file"}),
     }
 
+    # Dependencies found importable, shared by all executors for the life of
+    # the process; missing ones are re-checked so later installs are seen
+    _available_dependencies = set()
+
     def __init__(self, tool_config: Dict[str, Any]):
         """Initialize the executor with tool configuration."""
         self.tool_config = tool_config
@@ -91,6 +201,17 @@ class BasePythonExecutor:
         if "allowed_imports" in tool_config:
             self.allowed_modules.update(tool_config["allowed_imports"])
 
+        # Safety check results keyed by (code, allowed modules), so the
+        # cache stays correct when a run adds allowed imports
+        self._cached_ast_warnings = functools.lru_cache(maxsize=512)(
+            self._find_ast_warnings
+        )
+
+        # Restricted builtins and pre-imported modules, built on first use and
+        # rebuilt only when the allowed modules change
+        self._globals_template: Optional[Dict[str, Any]] = None
+        self._globals_template_modules: Optional[frozenset] = None
+
     def _check_ast_safety(self, code: str) -> tuple[bool, List[str]]:
         """
         Check code AST for dangerous operations.
@@ -98,60 +219,49 @@ class BasePythonExecutor:
         Returns:
             (is_safe, warnings)
         """
-        warnings = []
+        warnings = self._cached_ast_warnings(code, frozenset(self.allowed_modules))
+        return len(warnings) == 0, list(warnings)
 
+    def _find_ast_warnings(
+        self, code: str, allowed_modules: frozenset
+    ) -> Tuple[str, ...]:
+        """Parse ``code`` and return a warning for each dangerous operation."""
         try:
             tree = ast.parse(code)
         except SyntaxError as e:
-            return False, [f"Syntax error: {e.msg} at line {e.lineno}"]
-
-        for node in ast.walk(tree):
-            # Check for forbidden imports
-            if isinstance(node, ast.Import):
-                for alias in node.names:
-                    # Check if import is forbidden AND not explicitly allowed
-                    if (
-                        alias.name in self.FORBIDDEN_AST_NODES["Import"]
-                        and alias.name not in self.allowed_modules
-                    ):
-                        warnings.append(f"Forbidden import: {alias.name}")
-
-            # Check for forbidden function calls
-            elif isinstance(node, ast.Call):
-                if isinstance(node.func, ast.Name):
-                    if node.func.id in self.FORBIDDEN_AST_NODES["Call"]:
-                        warnings.append(f"Forbidden function call: {node.func.id}")
-                elif isinstance(node.func, ast.Attribute):
-                    if node.func.attr in self.FORBIDDEN_AST_NODES["Call"]:
-                        warnings.append(f"Forbidden method call: {node.func.attr}")
-
-            # Check for forbidden attribute access
-            elif isinstance(node, ast.Attribute):
-                if node.attr in self.FORBIDDEN_AST_NODES["Attribute"]:
-                    warnings.append(f"Forbidden attribute access: {node.attr}")
-
-        return len(warnings) == 0, warnings
+            return (f"Syntax error: {e.msg} at line {e.lineno}",)
+
+        visitor = _SafetyVisitor(self.FORBIDDEN_AST_NODES, allowed_modules)
+        visitor.visit(tree)
+        return tuple(visitor.warnings)
 
     def _create_safe_globals(
         self, additional_vars: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Create a safe globals dictionary with restricted builtins."""
-        # Create restricted builtins
-        safe_builtins = {}
-        for name in self.SAFE_BUILTINS:
-            if hasattr(__builtins__, name):
-                safe_builtins[name] = getattr(__builtins__, name)
-            elif hasattr(__builtins__, "__dict__") and name in __builtins__.__dict__:
-                safe_builtins[name] = __builtins__.__dict__[name]
-            else:
-                # Try to get from builtins module directly
-                try:
-                    import builtins
+        allowed_modules = frozenset(self.allowed_modules)
+        if self._globals_template_modules != allowed_modules:
+            self._globals_template = self._build_globals_template()
+            self._globals_template_modules = allowed_modules
+
+        globals_dict = self._globals_template.copy()
+        # Snippets can reach their builtins dict, so each run gets its own
+        globals_dict["__builtins__"] = globals_dict["__builtins__"].copy()
 
-                    if hasattr(builtins, name):
-                        safe_builtins[name] = getattr(builtins, name)
-                except ImportError:
-                    pass
+        # Add additional variables
+        if additional_vars:
+            globals_dict.update(additional_vars)
+
+        return globals_dict
+
+    def _build_globals_template(self) -> Dict[str, Any]:
+        """Build the restricted builtins and pre-imported allowed modules."""
+        # Create restricted builtins
+        safe_builtins = {
+            name: getattr(builtins, name)
+            for name in self.SAFE_BUILTINS
+            if hasattr(builtins, name)
+        }
 
         # Create safe __import__ function
         def safe_import(name, globals=None, locals=None, fromlist=(), level=0):
@@ -173,13 +283,7 @@ class BasePythonExecutor:
             except ImportError:
                 pass  # Skip modules that can't be imported
 
-        globals_dict = {"__builtins__": safe_builtins, **safe_modules}
-
-        # Add additional variables
-        if additional_vars:
-            globals_dict.update(additional_vars)
-
-        return globals_dict
+        return {"__builtins__": safe_builtins, **safe_modules}
 
     def _capture_output(self, func, *args, **kwargs):
         """Capture stdout and stderr during function execution."""
@@ -207,8 +311,6 @@ class BasePythonExecutor:
 
     def _execute_with_timeout(self, func, timeout_seconds: int, *args, **kwargs):
         """Execute function with timeout using signal or threading."""
-        import threading
-
         # Check if we're in the main thread
         is_main_thread = threading.current_thread() is threading.main_thread()
 
@@ -348,16 +450,17 @@ class BasePythonExecutor:
         print(f"📦 Checking dependencies: {dependencies}")
 
         for package in dependencies:
+            if package in self._available_dependencies:
+                print(f"   ✅ {package} is installed (cached)")
+                continue
+
             # Try multiple import strategies
             import_success = False
 
             # Strategy 1: Direct package name
-            try:
-                __import__(package.replace("-", "_"))
+            if _module_available(package.replace("-", "_")):
                 print(f"   ✅ {package} is installed (direct import)")
                 import_success = True
-            except ImportError:
-                pass
 
             # Strategy 2: Try common submodule patterns
             if not import_success:
@@ -368,28 +471,27 @@ class BasePythonExecutor:
                 ]
 
                 for pattern in patterns:
-                    try:
-                        __import__(pattern)
+                    if _module_available(pattern):
                         print(f"   ✅ {package} is installed (as {pattern})")
                         import_success = True
                         break
-                    except ImportError:
-                        continue
 
             # Strategy 3: Check if it's a submodule (e.g., keggtools.api)
             if not import_success and "." in package:
-                try:
-                    __import__(package)
+                if _module_available(package):
                     print(f"   ✅ {package} is installed (submodule)")
                     import_success = True
-                except ImportError:
-                    pass
 
-            # Strategy 4: Check parent package for submodules
+            # Strategy 4: Check parent package for submodules exposed as
+            # attributes; only this needs a real import, and only when the
+            # parent is known to exist
             if not import_success and "." in package:
                 parent_package = package.split(".")[0]
-                try:
-                    parent_module = __import__(parent_package)
+                if _module_available(parent_package):
+                    try:
+                        parent_module = __import__(parent_package)
+                    except ImportError:
+                        parent_module = None
                     # Try to access the submodule
                     submodule_name = package.split(".")[1]
                     if hasattr(parent_module, submodule_name):
@@ -397,15 +499,10 @@ class BasePythonExecutor:
                             f"   ✅ {package} is available (submodule of {parent_package})"
                         )
                         import_success = True
-                    else:
-                        # Try importing the submodule directly
-                        __import__(package)
-                        print(f"   ✅ {package} is installed (submodule)")
-                        import_success = True
-                except ImportError:
-                    pass
 
-            if not import_success:
+            if import_success:
+                self._available_dependencies.add(package)
+            else:
                 print(f"   ❌ {package} is not installed")
                 missing_packages.append(package)
 
@@ -572,6 +669,8 @@ class PythonCodeExecutor(BasePythonExecutor, BaseTool):
                             execution_time=0,
                         )
 
+            compiled = _compile_code(code)
+
             # Create safe execution environment
             safe_globals = self._create_safe_globals(additional_vars)
             safe_locals = {}
@@ -580,7 +679,7 @@ class PythonCodeExecutor(BasePythonExecutor, BaseTool):
             start_time = time.time()
 
             def execute_code():
-                return self._capture_output(exec, code, safe_globals, safe_locals)
+                return self._capture_output(exec, compiled, safe_globals, safe_locals)
 
             try:
                 result, stdout, stderr = self._execute_with_timeout(
@@ -696,34 +795,34 @@ class PythonScriptRunner(BasePythonExecutor, BaseTool):
             start_time = time.time()
 
             try:
-                result = subprocess.run(
+                process = subprocess.Popen(
                     cmd,
                     cwd=working_dir,
                     env=restricted_env,
-                    capture_output=True,
-                    text=True,
-                    timeout=timeout,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    # Own process group, so children the script starts can
+                    # be killed with it
+                    start_new_session=hasattr(os, "killpg"),
                 )
+                returncode, stdout, stderr = self._wait_and_collect(process, timeout)
 
                 execution_time = time.time() - start_time
 
-                if result.returncode == 0:
+                if returncode == 0:
                     return self._format_success_response(
-                        f"Script executed successfully "
-                        f"(exit code: {result.returncode})",
-                        result.stdout,
-                        result.stderr,
+                        f"Script executed successfully " f"(exit code: {returncode})",
+                        stdout,
+                        stderr,
                         execution_time,
                         code_lines=0,  # Not easily measurable for external scripts
                     )
                 else:
                     return self._format_error_response(
-                        RuntimeError(
-                            f"Script failed with exit code " f"{result.returncode}"
-                        ),
+                        RuntimeError(f"Script failed with exit code " f"{returncode}"),
                         "RuntimeError",
-                        result.stdout,
-                        result.stderr,
+                        stdout,
+                        stderr,
                         execution_time,
                     )
 
@@ -739,3 +838,52 @@ class PythonScriptRunner(BasePythonExecutor, BaseTool):
 
         except Exception as e:
             return self._format_error_response(e, type(e).__name__, execution_time=0)
+
+    def _wait_and_collect(
+        self, process: subprocess.Popen, timeout: float
+    ) -> Tuple[int, str, str]:
+        """
+        Wait for the script while draining its output on reader threads.
+
+        Only the tail of each stream is kept, so a script that logs heavily
+        cannot exhaust memory. One deadline covers both the script and the
+        draining of its output: a child process that keeps the pipes open
+        after the script exits also counts against it. When the deadline
+        passes, the script's process group is killed and
+        ``subprocess.TimeoutExpired`` is raised.
+        """
+        deadline = time.monotonic() + timeout
+        tails = (_OutputTail(), _OutputTail())
+        readers = [
+            threading.Thread(target=tail.drain, args=(stream,), daemon=True)
+            for tail, stream in zip(tails, (process.stdout, process.stderr))
+        ]
+        for reader in readers:
+            reader.start()
+
+        try:
+            returncode = process.wait(timeout=max(deadline - time.monotonic(), 0))
+            for reader in readers:
+                reader.join(max(deadline - time.monotonic(), 0))
+                if reader.is_alive():
+                    raise subprocess.TimeoutExpired(process.args, timeout)
+        except subprocess.TimeoutExpired:
+            # Killing the group closes every write end of the pipes, so the
+            # readers reach EOF. Readers blocked by a child that left the
+            # group are daemon threads and are abandoned after the grace time.
+            self._kill_process_group(process)
+            for reader in readers:
+                reader.join(_READER_GRACE_SECONDS)
+            raise
+        return returncode, tails[0].text(), tails[1].text()
+
+    @staticmethod
+    def _kill_process_group(process: subprocess.Popen) -> None:
+        """Kill the script and any children still in its process group."""
+        if hasattr(os, "killpg"):
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except OSError:
+                pass  # Group already gone
+        process.kill()
+        process.wait()
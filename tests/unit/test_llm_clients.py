@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""Tests for the LLM client wrappers used by AgenticTool."""
+
+import asyncio
+import logging
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tooluniverse.llm_clients import AzureOpenAIClient, GeminiClient, VLLMClient
+
+
+def _make_vllm_client():
+    return VLLMClient("test-model", "http://localhost:8000", logging.getLogger())
+
+
+class _FakeAsyncVLLM:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, messages, **kwargs):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        text = messages[-1]["content"].upper()
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=text))]
+        )
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.unit
+@pytest.mark.timeout(10)
+def test_vllm_infer_batch_keeps_requests_in_flight_together():
+    """A batch keeps up to max_concurrency requests in flight and keeps input order."""
+    client = VLLMClient(
+        "test-model", "http://localhost:8000", logging.getLogger(), max_concurrency=3
+    )
+    fake = _FakeAsyncVLLM()
+    batch = [[{"role": "user", "content": f"q{i}"}] for i in range(8)]
+
+    with patch.object(VLLMClient, "_make_async_client", return_value=fake):
+        results = client.infer_batch(batch, 0.0, 16, False)
+
+    assert results == [f"Q{i}" for i in range(8)]
+    assert fake.max_active == 3
+    assert fake.closed
+
+
+@pytest.mark.unit
+@pytest.mark.timeout(10)
+def test_vllm_infer_batch_works_inside_running_event_loop():
+    """infer_batch can be called from code already running an event loop."""
+    client = _make_vllm_client()
+    batch = [[{"role": "user", "content": "a"}], [{"role": "user", "content": "b"}]]
+
+    async def call_from_loop():
+        return client.infer_batch(batch, None, None, False)
+
+    with patch.object(
+        VLLMClient, "_make_async_client", return_value=_FakeAsyncVLLM(0)
+    ):
+        assert asyncio.run(call_from_loop()) == ["A", "B"]
+
+
+@pytest.mark.unit
+@pytest.mark.timeout(10)
+def test_vllm_infer_batch_sends_duplicate_greedy_prompts_once():
+    """Identical greedy conversations are sent once and share the answer."""
+    client = _make_vllm_client()
+    fake = _FakeAsyncVLLM(0)
+    sent = []
+    create = fake._create
+
+    async def recording_create(messages, **kwargs):
+        sent.append(messages[-1]["content"])
+        return await create(messages, **kwargs)
+
+    fake.chat.completions.create = recording_create
+    batch = [[{"role": "user", "content": c}] for c in ("a", "b", "a", "c", "b")]
+
+    with patch.object(VLLMClient, "_make_async_client", return_value=fake):
+        results = client.infer_batch(batch, 0, 16, False)
+
+    assert results == ["A", "B", "A", "C", "B"]
+    assert sorted(sent) == ["a", "b", "c"]
+
+
+@pytest.mark.unit
+def test_gemini_contents_match_flattened_user_and_system_turns():
+    """Cached system prefixes render the same text as flattening every turn."""
+    client = GeminiClient.__new__(GeminiClient)
+    messages = [
+        {"role": "system", "content": "You are terse."},
+        {"role": "system", "content": "Answer in English."},
+        {"role": "user", "content": "Hi"},
+        {"role": "assistant", "content": "Hello"},
+        {"role": "user", "content": "Bye"},
+    ]
+
+    contents = client._messages_to_contents(messages)
+
+    assert contents == "You are terse.\nAnswer in English.\nHi\nBye\n"
+    assert client._messages_to_contents(messages) == contents
+
+
+@pytest.mark.unit
+def test_gemini_contents_render_non_text_system_content():
+    """Multimodal system content is rendered without the prefix cache."""
+    client = GeminiClient.__new__(GeminiClient)
+    parts = [{"type": "text", "text": "Be brief."}]
+    messages = [
+        {"role": "system", "content": "You are terse."},
+        {"role": "system", "content": parts},
+        {"role": "user", "content": "Hi"},
+    ]
+
+    contents = client._messages_to_contents(messages)
+
+    assert contents == f"You are terse.\n{parts}\nHi\n"
+
+
+@pytest.mark.unit
+def test_azure_infer_stream_yields_delta_content():
+    """Streaming yields each non-empty delta and skips chunks without choices."""
+    import openai
+
+    client = AzureOpenAIClient.__new__(AzureOpenAIClient)
+    client.model_name = "gpt-4o"
+    client.logger = logging.getLogger()
+    client._openai = openai
+    client._default_limits = dict(AzureOpenAIClient.DEFAULT_MODEL_LIMITS)
+    client.client = MagicMock()
+
+    def chunk(text):
+        delta = SimpleNamespace(content=text)
+        return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    client.client.chat.completions.create.return_value = iter(
+        [SimpleNamespace(choices=[]), chunk("Hel"), chunk(None), chunk("lo")]
+    )
+
+    pieces = list(client.infer_stream([{"role": "user", "content": "hi"}], 0, 8, False))
+
+    assert pieces == ["Hel", "lo"]
+
+
+@pytest.mark.unit
+def test_azure_fallback_uses_advertised_limit_and_caches_it():
+    """A rejected request retries with the advertised limit, which is remembered."""
+    import openai
+
+    client = AzureOpenAIClient.__new__(AzureOpenAIClient)
+    client.model_name = "unknown-deployment"
+    client.logger = logging.getLogger()
+    client._openai = openai
+    client._default_limits = {}
+    client.client = MagicMock()
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs.get("max_completion_tokens", kwargs.get("max_tokens")))
+        if calls[-1] != 1500:
+            raise openai.BadRequestError(
+                "max_tokens too large: model supports at most 1500 completion tokens",
+                response=MagicMock(),
+                body=None,
+            )
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))]
+        )
+
+    client.client.chat.completions.create.side_effect = create
+    messages = [{"role": "user", "content": "hi"}]
+    with patch.dict(AzureOpenAIClient._FALLBACK_LIMIT_CACHE, clear=True):
+        assert client.infer(messages, 0, None, False) == "ok"
+        assert calls == [None, 1500]
+        calls.clear()
+        assert client.infer(messages, 0, None, False) == "ok"
+        assert calls == [1500]
+
+
+@pytest.mark.unit
+@pytest.mark.timeout(10)
+def test_vllm_infer_batch_starts_longest_prompts_first():
+    """Longer prompts are submitted first; results keep the input order."""
+    client = VLLMClient(
+        "test-model", "http://localhost:8000", logging.getLogger(), max_concurrency=1
+    )
+    fake = _FakeAsyncVLLM(0)
+    sent = []
+    create = fake._create
+
+    async def recording_create(messages, **kwargs):
+        sent.append(messages[-1]["content"])
+        return await create(messages, **kwargs)
+
+    fake.chat.completions.create = recording_create
+    contents = ["x" * n for n in (3, 9, 1, 7, 5, 2, 8, 4, 6, 10)]
+    batch = [[{"role": "user", "content": c}] for c in contents]
+
+    with patch.object(VLLMClient, "_make_async_client", return_value=fake):
+        results = client.infer_batch(batch, 0.5, 16, False)
+
+    assert results == [c.upper() for c in contents]
+    assert sent == sorted(contents, key=len, reverse=True)
+
+
+@pytest.mark.unit
+def test_vllm_infer_fails_fast_on_client_errors_and_retries_server_errors():
+    """4xx errors are not retried; 5xx errors retry after a jittered delay."""
+    client = _make_vllm_client()
+    client.client = MagicMock()
+    messages = [{"role": "user", "content": "hi"}]
+    ok = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))]
+    )
+
+    bad_request = Exception("bad request")
+    bad_request.status_code = 400
+    client.client.chat.completions.create.side_effect = bad_request
+    with patch("tooluniverse.llm_clients.time.sleep") as sleep:
+        assert client.infer(messages, 0, 8, False) is None
+    assert client.client.chat.completions.create.call_count == 1
+    sleep.assert_not_called()
+
+    unavailable = Exception("unavailable")
+    unavailable.status_code = 503
+    client.client.chat.completions.create.reset_mock()
+    client.client.chat.completions.create.side_effect = [unavailable, ok]
+    with patch("tooluniverse.llm_clients.time.sleep") as sleep:
+        assert client.infer(messages, 0, 8, False, retry_delay=2) == "ok"
+    assert client.client.chat.completions.create.call_count == 2
+    assert 1 <= sleep.call_args[0][0] <= 3
+
+
+@pytest.mark.unit
+def test_azure_fallback_limit_from_long_prompt_is_not_reused_for_short_ones():
+    """Fallback limits are cached per prompt length, not per model only."""
+    import openai
+
+    client = AzureOpenAIClient.__new__(AzureOpenAIClient)
+    client.model_name = "unknown-deployment"
+    client.logger = logging.getLogger()
+    client._openai = openai
+    client._default_limits = {}
+    client.client = MagicMock()
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs.get("max_completion_tokens", kwargs.get("max_tokens")))
+        long_prompt = len(kwargs["messages"][0]["content"]) > 1000
+        if long_prompt and calls[-1] != 64:
+            raise openai.BadRequestError(
+                "max_tokens too large: model supports at most 64 completion tokens",
+                response=MagicMock(),
+                body=None,
+            )
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))]
+        )
+
+    client.client.chat.completions.create.side_effect = create
+    long_messages = [{"role": "user", "content": "x" * 5000}]
+    short_messages = [{"role": "user", "content": "hi"}]
+    with patch.dict(AzureOpenAIClient._FALLBACK_LIMIT_CACHE, clear=True):
+        assert client.infer(long_messages, 0, None, False) == "ok"
+        assert calls == [None, 64]
+        calls.clear()
+        assert client.infer(short_messages, 0, None, False) == "ok"
+        assert calls == [None]
+        calls.clear()
+        assert client.infer(long_messages, 0, None, False) == "ok"
+        assert calls == [64]
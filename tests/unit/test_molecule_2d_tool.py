@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Tests for Molecule2DTool rendering paths."""
+
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tooluniverse import molecule_2d_tool
+from tooluniverse.molecule_2d_tool import Molecule2DTool
+
+
+def _make_tool():
+    return Molecule2DTool({"name": "visualize_molecule_2d"})
+
+
+@pytest.mark.unit
+def test_run_batch_matches_run_and_keeps_order():
+    """Batch results equal single runs, in input order, including failures."""
+    pytest.importorskip("rdkit")
+    tool = _make_tool()
+    args_list = [
+        {"smiles": "CCO"},
+        {},
+        {"smiles": "c1ccccc1", "output_format": "svg"},
+        {"smiles": "not-a-smiles"},
+    ]
+
+    results = tool.run_batch(args_list)
+
+    assert [r["success"] for r in results] == [True, False, True, False]
+    for arguments, result in zip(args_list, results):
+        assert result == tool.run(arguments)
+
+
+@pytest.mark.unit
+def test_resolve_molecule_name_caches_hits_but_not_failures():
+    """Resolved names are cached; failed lookups are retried on the next call."""
+    tool = _make_tool()
+    found = MagicMock(status_code=200)
+    found.json.return_value = {
+        "PropertyTable": {"Properties": [{"IsomericSMILES": "CC(=O)O"}]}
+    }
+    missing = MagicMock(status_code=404)
+    missing.raise_for_status.side_effect = Exception("404")
+
+    molecule_2d_tool._pubchem_smiles.cache_clear()
+    with patch.object(
+        molecule_2d_tool._PUBCHEM_SESSION, "get", side_effect=[missing, found]
+    ) as get:
+        assert tool._resolve_molecule_name("acetic acid") is None
+        assert tool._resolve_molecule_name("acetic acid") == "CC(=O)O"
+        assert tool._resolve_molecule_name("acetic acid") == "CC(=O)O"
+    assert get.call_count == 2
+    assert "acetic%20acid" in get.call_args[0][0]
+
+
+@pytest.mark.unit
+def test_run_batch_replaces_a_broken_pool(monkeypatch):
+    """A crashed worker fails its batch but not the batches after it."""
+    broken = Future()
+    broken.set_exception(BrokenProcessPool("worker died"))
+    pool = MagicMock()
+    pool.submit.return_value = broken
+    monkeypatch.setattr(molecule_2d_tool, "_POOL", pool)
+    tool = _make_tool()
+
+    results = tool.run_batch([{"smiles": "CCO"}, {"smiles": "CCC"}])
+
+    assert [r["success"] for r in results] == [False, False]
+    assert "worker died" in results[0]["error"]
+    assert molecule_2d_tool._POOL is None
+    pool.shutdown.assert_called_with(wait=False)
+
+
+@pytest.mark.unit
+def test_molecular_properties_are_cached_by_canonical_smiles():
+    """Equivalent molecules share one cache entry; None yields no properties."""
+    Chem = pytest.importorskip("rdkit.Chem")
+    molecule_2d_tool._properties_for_mol.cache_clear()
+
+    first = molecule_2d_tool._calculate_molecular_properties(Chem.MolFromSmiles("OCC"))
+    second = molecule_2d_tool._calculate_molecular_properties(
+        Chem.MolFromSmiles("CCO")
+    )
+
+    assert first == second
+    assert first["heavy_atoms"] == 3
+    assert molecule_2d_tool._properties_for_mol.cache_info().hits == 1
+    assert molecule_2d_tool._calculate_molecular_properties(None) == {}
+
+
+@pytest.mark.unit
+def test_render_canonicalizes_each_molecule_once():
+    """Rendering computes the canonical SMILES once for properties and output."""
+    pytest.importorskip("rdkit")
+    Chem = molecule_2d_tool._rdkit().Chem
+    molecule_2d_tool._properties_for_mol.cache_clear()
+
+    with patch.object(Chem, "MolToSmiles", wraps=Chem.MolToSmiles) as to_smiles:
+        rendered = molecule_2d_tool._render_molecule_2d(
+            "SMILES", "OCC", 200, 200, "svg"
+        )
+
+    assert to_smiles.call_count == 1
+    assert rendered["smiles"] == "CCO"
+    assert rendered["mol_props"]["heavy_atoms"] == 3
+
+
+@pytest.mark.unit
+def test_atom_and_bond_numbers_are_drawn():
+    """show_atom_numbers and show_bond_numbers change the rendered image."""
+    pytest.importorskip("rdkit")
+    tool = _make_tool()
+
+    for output_format in ("png", "svg"):
+        base = {"smiles": "CCO", "output_format": output_format}
+        plain = tool.run(base)
+        atoms = tool.run({**base, "show_atom_numbers": True})
+        bonds = tool.run({**base, "show_bond_numbers": True})
+
+        images = {r["visualization"]["static_image"] for r in (plain, atoms, bonds)}
+        assert len(images) == 3
+        assert atoms["visualization"]["metadata"]["show_atom_numbers"] is True
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Tests for Molecule3DTool."""
+
+import asyncio
+import re
+
+import pytest
+
+pytest.importorskip("rdkit")
+pytest.importorskip("py3Dmol")
+
+from tooluniverse import molecule_3d_tool  # noqa: E402
+from tooluniverse.molecule_3d_tool import Molecule3DTool  # noqa: E402
+
+
+def _make_tool():
+    return Molecule3DTool({"name": "visualize_molecule_3d"})
+
+
+def _without_viewer_ids(result):
+    """Replace the per-response viewer ids so results can be compared."""
+    if "visualization" not in result:
+        return result
+    html = re.sub(r"[0-9a-f]{32}", "VIEWER", result["visualization"]["html"])
+    return {**result, "visualization": {**result["visualization"], "html": html}}
+
+
+@pytest.mark.unit
+def test_restyling_same_smiles_reuses_embedding():
+    """Changing only the view style reuses the cached 3D embedding."""
+    tool = _make_tool()
+    molecule_3d_tool._prepare_smiles_3d.cache_clear()
+
+    first = tool.run({"smiles": "CCO", "style": "stick"})
+    second = tool.run({"smiles": "CCO", "style": "sphere", "color_scheme": "spectrum"})
+
+    assert first["success"] and second["success"]
+    assert molecule_3d_tool._prepare_smiles_3d.cache_info().hits == 1
+    assert first["visualization"]["data"] == second["visualization"]["data"]
+
+
+@pytest.mark.unit
+def test_run_batch_and_run_async_match_run():
+    """run_batch and run_async return the same results as run."""
+    tool = _make_tool()
+    args_list = [{"smiles": "CCO"}, {}, {"smiles": "c1ccccc1", "style": "sphere"}]
+
+    results = tool.run_batch(args_list)
+
+    assert [r["success"] for r in results] == [True, False, True]
+    for arguments, result in zip(args_list, results):
+        assert _without_viewer_ids(result) == _without_viewer_ids(tool.run(arguments))
+    assert _without_viewer_ids(
+        asyncio.run(tool.run_async(args_list[0]))
+    ) == _without_viewer_ids(results[0])
+
+
+@pytest.mark.unit
+def test_cached_viewer_html_gets_a_fresh_element_id():
+    """Two renders of one molecule never share a viewer element id."""
+    tool = _make_tool()
+
+    first = tool.run({"smiles": "CCO"})["visualization"]["html"]
+    second = tool.run({"smiles": "CCO"})["visualization"]["html"]
+
+    first_ids = set(re.findall(r"3dmolviewer_(\w+)", first))
+    second_ids = set(re.findall(r"3dmolviewer_(\w+)", second))
+    assert first_ids and second_ids
+    assert not first_ids & second_ids
+    assert molecule_3d_tool._viewer_html.cache_info().hits >= 1
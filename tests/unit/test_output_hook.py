@@ -0,0 +1,620 @@
+#!/usr/bin/env python3
+"""Tests for hook rule evaluation and HookManager dispatch."""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tooluniverse.output_hook import (
+    FileSaveHook,
+    HookManager,
+    HookRule,
+    OutputHook,
+    SummarizationHook,
+    _dump_json_bytes,
+    _write_all,
+    _parse_hook_config_file,
+    _ResultMeta,
+)
+
+
+class _CountingStr:
+    """Result whose stringification is counted."""
+
+    calls = 0
+
+    def __str__(self):
+        type(self).calls += 1
+        return "x" * 100
+
+
+class _PassThroughHook(OutputHook):
+    def process(self, result, tool_name=None, arguments=None, context=None):
+        return result
+
+
+def _make_manager(hooks):
+    with patch.object(
+        HookManager, "_validate_llm_api_keys", return_value=True
+    ), patch.object(HookManager, "_load_hooks"):
+        manager = HookManager({"hooks": []}, tooluniverse=None)
+    manager.hooks = hooks
+    manager._load_pending_tools = lambda: None
+    return manager
+
+
+@pytest.mark.unit
+def test_output_length_rule_uses_shared_result_meta():
+    """Length rules read the cached length and still work without a meta."""
+    rule = HookRule({"output_length": {"threshold": 50, "operator": ">"}})
+    meta = _ResultMeta("x" * 100)
+
+    assert rule.evaluate(meta.result, "tool", {}, {}, meta)
+    assert meta.length == 100
+    at_threshold = HookRule({"output_length": {"threshold": 100}})
+    assert not at_threshold.evaluate("x" * 100, "tool", {}, {})
+
+
+@pytest.mark.unit
+def test_apply_hooks_stringifies_result_once_for_all_length_rules():
+    """Several length-gated hooks share one str() of the result."""
+    hooks = [
+        _PassThroughHook(
+            {"name": f"h{i}", "conditions": {"output_length": {"threshold": 10}}}
+        )
+        for i in range(3)
+    ]
+    manager = _make_manager(hooks)
+    result = _CountingStr()
+    _CountingStr.calls = 0
+
+    assert manager.apply_hooks(result, "some_tool", {}, {}) is result
+    assert _CountingStr.calls == 1
+
+
+@pytest.mark.unit
+def test_compiled_rule_keeps_condition_precedence():
+    """A content_type mismatch defers to the tool_name check."""
+    rule = HookRule({"content_type": "json", "tool_name": "search"})
+
+    assert rule.evaluate({"a": 1}, "other", {}, {})
+    assert rule.evaluate("text", "search", {}, {})
+    assert not rule.evaluate("text", "other", {}, {})
+    assert HookRule({"output_length": {"operator": "<", "threshold": 4}}).evaluate(
+        "abc", "other", {}, {}
+    )
+
+
+@pytest.mark.unit
+def test_summarization_hook_reuses_shared_composer_executor():
+    """Composer calls run on one class-level executor across invocations."""
+    threads = []
+
+    def run_one_function(call):
+        threads.append(threading.current_thread().name)
+        return {"success": True, "summary": "short"}
+
+    tu = SimpleNamespace(
+        callable_functions={"OutputSummarizationComposer": object()},
+        all_tool_dict={},
+        run_one_function=run_one_function,
+    )
+    hook = SummarizationHook({"name": "summarize"}, tu)
+
+    assert hook.process("long output", "tool") == "short"
+    executor, _ = SummarizationHook._get_executor(4)
+    assert hook.process("long output", "tool") == "short"
+    assert SummarizationHook._get_executor(4)[0] is executor
+    assert all(name.startswith("summarize-hook") for name in threads)
+
+
+@pytest.mark.unit
+def test_get_hook_looks_up_loaded_hooks_by_name():
+    """Hooks created by _load_hooks are indexed by name until cleared."""
+    manager = _make_manager([])
+    manager.config = {"hooks": [{"name": "a"}, {"name": "b"}, {"name": "a"}]}
+    created = []
+
+    def create(hook_config):
+        created.append(_PassThroughHook(hook_config))
+        return created[-1]
+
+    with patch.object(manager, "_auto_load_hook_tools"), patch.object(
+        manager, "_create_hook_instance", side_effect=create
+    ):
+        manager._load_hooks()
+
+    assert manager.get_hook("a") is created[0]
+    assert manager.get_hook("b") is created[1]
+    manager.disable_hook("b")
+    assert not created[1].enabled
+    manager.disable_hooks()
+    assert manager.get_hook("a") is None
+
+
+@pytest.mark.unit
+def test_apply_hooks_runs_hooks_in_priority_order():
+    """Hooks run lowest priority first, using the cached ordering."""
+    calls = []
+
+    class _RecordingHook(OutputHook):
+        def process(self, result, tool_name=None, arguments=None, context=None):
+            calls.append(self.name)
+            return result
+
+    manager = _make_manager(
+        [
+            _RecordingHook({"name": "late", "priority": 5}),
+            _RecordingHook({"name": "early", "priority": 1}),
+        ]
+    )
+
+    manager.apply_hooks("out", "some_tool", {}, {})
+    manager.apply_hooks("out", "some_tool", {}, {})
+
+    assert calls == ["early", "late", "early", "late"]
+
+
+@pytest.mark.unit
+def test_custom_composer_tools_are_excluded_from_hooks():
+    """Composer tools named in hook configs join the recursion guard."""
+    manager = _make_manager([])
+    assert manager._is_hook_tool("ToolOutputSummarizer")
+    assert not manager._is_hook_tool("MyComposer")
+
+    manager._auto_load_hook_tools(
+        [{"type": "SummarizationHook", "hook_config": {"composer_tool": "MyComposer"}}]
+    )
+
+    assert manager._is_hook_tool("MyComposer")
+    assert not manager._is_hook_tool("some_tool")
+
+
+@pytest.mark.unit
+def test_summarization_hook_skips_stringifying_without_composer():
+    """A missing composer tool returns the result without calling str() on it."""
+    tu = SimpleNamespace(callable_functions={}, all_tool_dict={})
+    hook = SummarizationHook({"name": "summarize"}, tu)
+    result = _CountingStr()
+    _CountingStr.calls = 0
+
+    assert hook.process(result, "tool") is result
+    assert _CountingStr.calls == 0
+
+
+@pytest.mark.unit
+def test_apply_hooks_only_runs_hooks_applicable_to_the_tool():
+    """Tool-specific hooks are filtered once per tool name and then reused."""
+    calls = []
+
+    class _RecordingHook(OutputHook):
+        def process(self, result, tool_name=None, arguments=None, context=None):
+            calls.append((self.name, tool_name))
+            return result
+
+    manager = _make_manager(
+        [
+            _RecordingHook({"name": "global"}),
+            _RecordingHook({"name": "search_only", "tool_name": "search"}),
+        ]
+    )
+
+    with patch.object(
+        manager, "_is_hook_applicable", wraps=manager._is_hook_applicable
+    ) as applicable:
+        for tool in ("search", "fetch", "search"):
+            manager.apply_hooks("out", tool, {}, {})
+
+    assert calls == [
+        ("global", "search"),
+        ("search_only", "search"),
+        ("global", "fetch"),
+        ("global", "search"),
+        ("search_only", "search"),
+    ]
+    assert applicable.call_count == 4
+
+
+@pytest.mark.unit
+def test_hook_config_file_is_parsed_once_and_copied(tmp_path):
+    """Managers share one parse of an unchanged config file but not its dicts."""
+    config_file = tmp_path / "hook_config.json"
+    config_file.write_text(json.dumps({"hooks": [{"name": "h"}]}))
+    _parse_hook_config_file.cache_clear()
+
+    with patch.object(
+        HookManager, "_get_config_file_path", return_value=config_file
+    ), patch("tooluniverse.output_hook.json.load", wraps=json.load) as load:
+        first = _make_manager([])
+        first.config = {}
+        first._load_hook_config()
+        first.config["hooks"][0]["tool_name"] = "mutated"
+        second = _make_manager([])
+        second.config = {}
+        second._load_hook_config()
+
+    assert load.call_count == 1
+    assert second.config == {"hooks": [{"name": "h"}]}
+
+
+@pytest.mark.unit
+def test_load_hooks_leaves_config_entries_untouched():
+    """Tool and category annotations and type defaults go on copies."""
+    manager = _make_manager([])
+    manager.config = {
+        "tool_specific_hooks": {
+            "search": {"hooks": [{"name": "save", "type": "FileSaveHook"}]}
+        },
+        "category_hooks": {"web": {"hooks": [{"name": "s2", "type": "FileSaveHook"}]}},
+    }
+    snapshot = json.loads(json.dumps(manager.config))
+
+    with patch.object(manager, "_auto_load_hook_tools"):
+        manager._load_hooks()
+
+    assert manager.config == snapshot
+    assert manager.get_hook("save").config["tool_name"] == "search"
+    assert manager.get_hook("s2").config["category"] == "web"
+
+
+@pytest.mark.unit
+def test_summarization_hook_remembers_composer_once_found():
+    """Availability is re-checked only until the composer has been seen."""
+    tu = SimpleNamespace(
+        callable_functions={},
+        all_tool_dict={},
+        run_one_function=lambda call: {"success": True, "summary": "short"},
+    )
+    hook = SummarizationHook({"name": "summarize"}, tu)
+
+    assert hook.process("long output", "tool") == "long output"
+    tu.callable_functions["OutputSummarizationComposer"] = object()
+    assert hook.process("long output", "tool") == "short"
+    tu.callable_functions = {}
+    assert hook.process("long output", "tool") == "short"
+
+
+@pytest.mark.unit
+def test_summarization_reuses_string_computed_by_length_rule():
+    """A result stringified by the length rule is not stringified again."""
+    sent = []
+
+    def run_one_function(call):
+        sent.append(call["arguments"]["tool_output"])
+        return {"success": True, "summary": "short"}
+
+    tu = SimpleNamespace(
+        callable_functions={"OutputSummarizationComposer": object()},
+        all_tool_dict={},
+        run_one_function=run_one_function,
+    )
+    hook = SummarizationHook(
+        {"name": "summarize", "conditions": {"output_length": {"threshold": 10}}}, tu
+    )
+    manager = _make_manager([hook])
+    result = _CountingStr()
+    _CountingStr.calls = 0
+
+    assert manager.apply_hooks(result, "some_tool", {}, {}) == "short"
+    assert _CountingStr.calls == 1
+    assert sent == ["x" * 100]
+
+
+@pytest.mark.unit
+def test_apply_hooks_returns_immediately_without_hooks():
+    """With no hooks loaded, pending tool loading is not attempted."""
+    manager = _make_manager([])
+    with patch.object(manager, "_load_pending_tools") as load_pending:
+        assert manager.apply_hooks("out", "some_tool", {}, {}) == "out"
+    load_pending.assert_not_called()
+
+
+@pytest.mark.unit
+def test_tool_name_rules_are_resolved_when_indexing_hooks():
+    """Hooks whose rule only names another tool are left out of its index."""
+    named = _PassThroughHook({"name": "named", "conditions": {"tool_name": "search"}})
+    sized = _PassThroughHook(
+        {
+            "name": "sized",
+            "conditions": {"tool_name": "search", "output_length": {"threshold": 1}},
+        }
+    )
+    manager = _make_manager([named, sized])
+
+    manager.apply_hooks("out", "search", {}, {})
+    manager.apply_hooks("out", "fetch", {}, {})
+
+    assert named.rule.only_tool_name == "search"
+    assert sized.rule.only_tool_name is None
+    assert manager._applicable_hooks["search"] == (named, sized)
+    assert manager._applicable_hooks["fetch"] == (sized,)
+
+
+@pytest.mark.unit
+def test_found_api_keys_are_remembered_until_invalidated():
+    """Only a positive API key check is cached."""
+    from tooluniverse.agentic_tool import AgenticTool
+
+    HookManager.invalidate_api_key_cache()
+    with patch.object(
+        AgenticTool, "has_any_api_keys", side_effect=[False, True, False]
+    ) as check:
+        manager = _make_manager([])
+        assert not manager._validate_llm_api_keys()
+        assert manager._validate_llm_api_keys()
+        assert manager._validate_llm_api_keys()
+        assert check.call_count == 2
+        HookManager.invalidate_api_key_cache()
+        assert not manager._validate_llm_api_keys()
+    HookManager.invalidate_api_key_cache()
+
+
+@pytest.mark.unit
+def test_file_save_hook_writes_output_and_describes_it(tmp_path):
+    """FileSaveHook saves the result and reports where and what it wrote."""
+    hook = FileSaveHook({"name": "save", "temp_dir": str(tmp_path / "out")})
+    data = {"genes": ["TP53", "BRCA1"], "note": "é"}
+
+    response = hook.process(data, "search", {"q": "x"}, {})
+
+    assert response["data_format"] == "json"
+    assert response["data_structure"] == "dict with 2 keys"
+    with open(response["file_path"], encoding="utf-8") as f:
+        assert json.load(f) == data
+    assert response["file_size"] == os.path.getsize(response["file_path"])
+    assert response["metadata"]["hook_name"] == "save"
+    assert response["metadata"]["processing_time"] == response["created_at"]
+
+    text_response = FileSaveHook({"name": "tmp"}).process("plainé", "t", {}, {})
+    try:
+        with open(text_response["file_path"], encoding="utf-8") as f:
+            assert f.read() == "plainé"
+        assert text_response["file_size"] == len("plainé".encode("utf-8"))
+    finally:
+        os.remove(text_response["file_path"])
+
+
+@pytest.mark.unit
+def test_dump_json_bytes_matches_json_module_and_falls_back():
+    """Encoded bytes match json.dumps, including data orjson cannot encode."""
+    for data in ({"a": [1, 2.5, {"b": "é"}], "c": None}, {"big": 2**70}):
+        expected = json.dumps(data, indent=2, ensure_ascii=False)
+        assert _dump_json_bytes(data).decode("utf-8") == expected
+
+
+@pytest.mark.unit
+def test_hook_tools_are_only_ensured_until_ready():
+    """Once both hook tools are instantiated, later checks do nothing."""
+    manager = _make_manager([])
+    tu = SimpleNamespace(
+        tool_category_dicts={"output_summarization": {}},
+        all_tool_dict={"ToolOutputSummarizer": {}, "OutputSummarizationComposer": {}},
+        callable_functions={},
+        init_tool=MagicMock(),
+    )
+    manager.tooluniverse = tu
+    with patch("tooluniverse.output_hook._ensure_compose_registered"):
+        manager._ensure_hook_tools_loaded()
+        assert not manager._hook_tools_ready
+        assert tu.init_tool.call_count == 2
+
+        tu.callable_functions = dict.fromkeys(tu.all_tool_dict)
+        manager._ensure_hook_tools_loaded()
+        assert manager._hook_tools_ready
+
+        tu.init_tool.reset_mock()
+        tu.callable_functions = {}
+        manager._ensure_hook_tools_loaded()
+        tu.init_tool.assert_not_called()
+
+
+@pytest.mark.unit
+def test_pending_tools_load_in_one_call():
+    """Queued categories and the summarization category share a load_tools call."""
+    manager = _make_manager([])
+    del manager._load_pending_tools
+    tu = SimpleNamespace(all_tools=[], tool_category_dicts={}, load_tools=MagicMock())
+    manager.tooluniverse = tu
+    manager._pending_tools_to_load = ["extra_category"]
+
+    with patch.object(manager, "_ensure_hook_tools_loaded") as ensure:
+        manager._load_pending_tools()
+
+    tu.load_tools.assert_called_once_with(["extra_category", "output_summarization"])
+    assert manager._pending_tools_to_load == []
+    ensure.assert_called_once()
+
+
+@pytest.mark.unit
+def test_file_save_hook_cleanup_removes_only_old_prefixed_files(tmp_path):
+    """Cleanup deletes prefixed files past the age limit and keeps the rest."""
+    hook = FileSaveHook(
+        {"name": "save", "temp_dir": str(tmp_path), "cleanup_age_hours": 1}
+    )
+    old, fresh, other = (tmp_path / n for n in ("tool_output_a", "tool_output_b", "x"))
+    for path in (old, fresh, other):
+        path.write_text("data")
+    (tmp_path / "tool_output_dir").mkdir()
+    os.utime(old, (0, 0))
+    os.utime(other, (0, 0))
+
+    hook._cleanup_old_files()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "tool_output_b",
+        "tool_output_dir",
+        "x",
+    ]
+
+
+@pytest.mark.unit
+def test_file_save_hook_detects_json_text_after_leading_whitespace():
+    """Strings starting with { or [ after whitespace are treated as JSON."""
+    hook = FileSaveHook({"name": "save"})
+
+    assert hook._analyze_data(' \n\u2003{"a": 1}')[0] == "json"
+    assert hook._analyze_data("\t[1, 2]")[0] == "json"
+    assert hook._analyze_data("  plain {text}") == ("txt", "text with 14 characters")
+    assert hook._analyze_data("   ")[0] == "txt"
+
+
+@pytest.mark.unit
+def test_file_save_hook_analyzes_booleans_and_subclasses():
+    """Booleans are no longer reported as numbers; dict subclasses stay JSON."""
+    from collections import OrderedDict
+
+    hook = FileSaveHook({"name": "save"})
+
+    assert hook._analyze_data(True) == ("json", "boolean value")
+    assert hook._analyze_data(3) == ("json", "numeric value")
+    assert hook._analyze_data(OrderedDict(a=1)) == ("json", "dict with 1 keys")
+    assert hook._analyze_data(b"x") == ("bin", "binary data of type bytes")
+
+
+@pytest.mark.unit
+def test_hook_type_defaults_are_built_once_and_explicit_values_win():
+    """Defaults are shared per hook type and never override a hook's own values."""
+    manager = _make_manager([])
+    manager.config = {
+        "hook_type_defaults": {"FileSaveHook": {"default_file_prefix": "saved"}}
+    }
+    explicit = {"type": "FileSaveHook", "hook_config": {"auto_cleanup": True}}
+
+    first = manager._apply_hook_type_defaults(explicit)
+    second = manager._apply_hook_type_defaults({"type": "FileSaveHook"})
+
+    assert first["hook_config"]["file_prefix"] == "saved"
+    assert first["hook_config"]["auto_cleanup"] is True
+    assert second["hook_config"]["auto_cleanup"] is False
+    assert explicit["hook_config"] == {"auto_cleanup": True}
+    defaults = manager._get_type_defaults("FileSaveHook")
+    assert manager._get_type_defaults("FileSaveHook") is defaults
+    with pytest.raises(TypeError):
+        defaults["file_prefix"] = "changed"
+
+
+@pytest.mark.unit
+def test_hook_with_tool_names_applies_only_to_listed_tools():
+    """A tool_names list limits one hook to several tools."""
+    hook = _PassThroughHook({"name": "shared", "tool_names": ["a", "b"]})
+    manager = _make_manager([hook])
+
+    assert hook.tool_names == frozenset({"a", "b"})
+    assert manager._is_hook_applicable(hook, "a", {})
+    assert manager._is_hook_applicable(hook, "b", {})
+    assert not manager._is_hook_applicable(hook, "c", {})
+    assert _PassThroughHook({"name": "global"}).tool_names is None
+
+
+@pytest.mark.unit
+def test_file_save_hook_error_returns_bounded_preview(tmp_path):
+    """On a write failure only a short preview of the result is returned."""
+    hook = FileSaveHook({"name": "save", "temp_dir": str(tmp_path)})
+    result = {"items": ["x" * 100] * 10000}
+
+    with patch.object(FileSaveHook, "_encode_data", side_effect=OSError("disk full")):
+        response = hook.process(result, "t", {}, {})
+        text_response = hook.process("short", "t", {}, {})
+
+    assert "disk full" in response["error"]
+    assert response["original_output"] == json.dumps(result)[:500]
+    assert response["original_output_type"] == "dict"
+    assert response["original_output_size"] == 1
+    assert text_response["original_output"] == "short"
+    assert text_response["original_output_size"] == 5
+
+
+@pytest.mark.unit
+def test_file_save_hook_has_no_instance_dict(tmp_path):
+    """FileSaveHook keeps its settings in slots."""
+    hook = FileSaveHook({"name": "save", "temp_dir": str(tmp_path)})
+
+    assert not hasattr(hook, "__dict__")
+    assert hook.temp_dir == str(tmp_path)
+
+
+@pytest.mark.unit
+def test_write_all_retries_partial_writes(tmp_path):
+    """_write_all keeps writing until the whole payload is on disk."""
+    path = tmp_path / "out.bin"
+    data = bytes(range(256)) * 10
+    real_write = os.write
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o600)
+    try:
+        with patch(
+            "tooluniverse.output_hook.os.write",
+            side_effect=lambda f, buf: real_write(f, bytes(buf[:100])),
+        ) as write:
+            _write_all(fd, data)
+    finally:
+        os.close(fd)
+
+    assert path.read_bytes() == data
+    assert write.call_count == 26
+
+
+@pytest.mark.unit
+def test_summarization_skips_composer_while_workers_stay_busy():
+    """A timed-out call holds its worker; later outputs give up after waiting."""
+    release = threading.Event()
+    calls = []
+
+    def run_one_function(call):
+        calls.append(call)
+        if len(calls) == 1:
+            release.wait(10)
+        return {"success": True, "summary": "short"}
+
+    tu = SimpleNamespace(
+        callable_functions={"OutputSummarizationComposer": object()},
+        all_tool_dict={},
+        run_one_function=run_one_function,
+    )
+    hook = SummarizationHook(
+        {
+            "name": "summarize",
+            "hook_config": {"composer_timeout_sec": 1, "composer_max_workers": 1},
+        },
+        tu,
+    )
+
+    assert hook.process("slow output", "tool") == "slow output"
+    assert hook.process("next output", "tool") == "next output"
+    assert len(calls) == 1
+
+    release.set()
+    _, slots = SummarizationHook._get_executor(1)
+    assert slots.acquire(timeout=5)
+    slots.release()
+    assert hook.process("last output", "tool") == "short"
+    assert len(calls) == 2
+
+
+@pytest.mark.unit
+def test_summarization_waits_for_a_worker_under_concurrent_calls():
+    """Healthy calls beyond the pool size queue instead of being skipped."""
+
+    def run_one_function(call):
+        time.sleep(0.2)
+        return {"success": True, "summary": "short"}
+
+    tu = SimpleNamespace(
+        callable_functions={"OutputSummarizationComposer": object()},
+        all_tool_dict={},
+        run_one_function=run_one_function,
+    )
+    hook = SummarizationHook(
+        {"name": "summarize", "hook_config": {"composer_max_workers": 2}}, tu
+    )
+
+    with ThreadPoolExecutor(max_workers=5) as callers:
+        outputs = [f"out {i}" for i in range(5)]
+        results = list(callers.map(lambda out: hook.process(out, "tool"), outputs))
+
+    assert results == ["short"] * 5
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Tests for the sandboxed PythonCodeExecutor."""
+
+import io
+import os
+import time
+
+import pytest
+
+from tooluniverse import python_executor_tool
+from tooluniverse.python_executor_tool import PythonCodeExecutor, PythonScriptRunner
+
+
+def _make_executor():
+    return PythonCodeExecutor({"name": "python_code_executor"})
+
+
+def _wait_until_dead(pid, timeout=5.0):
+    """Poll /proc until ``pid`` is gone or a zombie; True without /proc."""
+    status = f"/proc/{pid}/status"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with open(status) as f:
+                state = next(line for line in f if line.startswith("State:"))
+        except (FileNotFoundError, ProcessLookupError):
+            return True
+        if "Z" in state or "X" in state:
+            return True
+        time.sleep(0.05)
+    return not os.path.exists("/proc")
+
+
+@pytest.mark.unit
+def test_repeated_snippet_reuses_safety_check_and_compiled_code():
+    """Resubmitting the same code skips parsing, validation and compiling."""
+    executor = _make_executor()
+    python_executor_tool._compile_code.cache_clear()
+    code = "import math\nresult = math.sqrt(16)\nprint(result)"
+
+    first = executor.run({"code": code})
+    second = executor.run({"code": code})
+
+    assert first["success"] and second["success"]
+    assert first["result"] == second["result"] == 4.0
+    assert second["stdout"] == "4.0\n"
+    assert python_executor_tool._compile_code.cache_info().hits == 1
+    assert executor._cached_ast_warnings.cache_info().hits == 1
+
+
+@pytest.mark.unit
+def test_safety_check_cache_follows_allowed_imports():
+    """Allowing a forbidden module at run time is not masked by the cache."""
+    executor = _make_executor()
+    code = "import os\nresult = 1"
+
+    assert executor.run({"code": code})["error_type"] == "SecurityError"
+    allowed = executor.run({"code": code, "allowed_imports": ["os"]})
+
+    assert allowed["success"]
+    assert allowed["result"] == 1
+
+
+@pytest.mark.unit
+def test_safety_check_flags_from_imports_calls_and_attributes():
+    """The AST check covers from-imports as well as plain imports."""
+    executor = _make_executor()
+
+    is_safe, warnings = executor._check_ast_safety(
+        "from subprocess import run\nimport sys\nx = obj.open\neval('1')"
+    )
+
+    assert not is_safe
+    assert sorted(warnings) == [
+        "Forbidden attribute access: open",
+        "Forbidden function call: eval",
+        "Forbidden import: subprocess",
+        "Forbidden import: sys",
+    ]
+    assert executor._check_ast_safety("from math import sqrt") == (True, [])
+    assert executor._check_ast_safety("from os.path import join") == (
+        False,
+        ["Forbidden import: os.path"],
+    )
+    assert executor._check_ast_safety("from urllib.request import urlopen") == (
+        False,
+        ["Forbidden import: urllib.request"],
+    )
+    assert executor._check_ast_safety("import http.client, json.decoder") == (
+        False,
+        ["Forbidden import: http.client"],
+    )
+    assert executor._check_ast_safety("def f(:")[1][0].startswith("Syntax error")
+
+
+@pytest.mark.unit
+def test_safe_globals_template_is_reused_but_runs_stay_isolated():
+    """Builtins and modules are built once; each run gets fresh dicts."""
+    executor = _make_executor()
+
+    first = executor._create_safe_globals({"x": 1})
+    first["__builtins__"]["len"] = None
+    second = executor._create_safe_globals()
+
+    assert second["__builtins__"]["len"] is len
+    assert second["math"] is first["math"]
+    assert "x" not in second
+    template = executor._globals_template
+
+    executor.allowed_modules.add("os")
+    third = executor._create_safe_globals()
+
+    assert executor._globals_template is not template
+    assert "os" in third
+
+
+@pytest.mark.unit
+@pytest.mark.timeout(30)
+def test_script_runner_streams_output_and_enforces_timeout(tmp_path):
+    """Script output is drained while it runs; slow scripts are killed."""
+    runner = PythonScriptRunner({"name": "python_script_runner"})
+    script = tmp_path / "loud.py"
+    script.write_text(
+        "import sys\n"
+        "sys.stdout.write('x' * 200000 + '\\r\\n')\n"
+        "sys.stderr.write('warn\\n')\n"
+        "sys.exit(int(sys.argv[1]))\n"
+    )
+
+    ok = runner.run({"script_path": str(script), "script_args": ["0"]})
+    failed = runner.run({"script_path": str(script), "script_args": ["3"]})
+
+    assert ok["success"]
+    assert ok["stdout"] == "x" * 200000 + "\n"
+    assert ok["stderr"] == "warn\n"
+    assert failed["error"] == "Script failed with exit code 3"
+
+    slow = tmp_path / "slow.py"
+    slow.write_text("import time\ntime.sleep(30)\n")
+    timed_out = runner.run({"script_path": str(slow), "timeout": 1})
+
+    assert timed_out["error_type"] == "TimeoutError"
+
+
+@pytest.mark.unit
+@pytest.mark.timeout(30)
+@pytest.mark.skipif(not hasattr(os, "killpg"), reason="needs process groups")
+def test_script_runner_timeout_covers_children_holding_the_pipes(tmp_path):
+    """A child that outlives the script cannot stretch the timeout."""
+    runner = PythonScriptRunner({"name": "python_script_runner"})
+    pid_file = tmp_path / "child.pid"
+    script = tmp_path / "spawn.py"
+    script.write_text(
+        "import subprocess, sys\n"
+        "child = subprocess.Popen(\n"
+        "    [sys.executable, '-c', 'import time; time.sleep(20)']\n"
+        ")\n"
+        f"open({str(pid_file)!r}, 'w').write(str(child.pid))\n"
+        "print('parent done')\n"
+    )
+
+    start = time.monotonic()
+    result = runner.run({"script_path": str(script), "timeout": 2})
+    elapsed = time.monotonic() - start
+
+    assert result["error_type"] == "TimeoutError"
+    assert elapsed < 10
+    assert _wait_until_dead(int(pid_file.read_text()))
+
+
+@pytest.mark.unit
+def test_output_tail_keeps_only_the_last_bytes():
+    """Output beyond the limit is dropped from the front and flagged."""
+    tail = python_executor_tool._OutputTail(limit=10)
+
+    tail.drain(io.BytesIO(b"0123456789" * 20000 + b"end"))
+
+    assert tail.text() == "[earlier output truncated]\n3456789end"
+
+
+@pytest.mark.unit
+def test_found_dependencies_are_not_probed_again(monkeypatch):
+    """A dependency found once is remembered; missing ones are re-checked."""
+    executor = _make_executor()
+    monkeypatch.setattr(PythonCodeExecutor, "_available_dependencies", set())
+
+    first = executor._check_and_install_dependencies(["json"], False, True)
+    missing = executor._check_and_install_dependencies(
+        ["json", "no_such_pkg_xyz"], False, False
+    )
+
+    assert first["success"]
+    assert PythonCodeExecutor._available_dependencies == {"json"}
+    assert missing["missing_packages"] == ["no_such_pkg_xyz"]
+    assert "no_such_pkg_xyz" not in PythonCodeExecutor._available_dependencies
+
+
+@pytest.mark.unit
+def test_dependency_probe_does_not_import_modules(monkeypatch):
+    """Packages are located with find_spec instead of being imported."""
+    import sys
+
+    executor = _make_executor()
+    monkeypatch.setattr(PythonCodeExecutor, "_available_dependencies", set())
+    monkeypatch.delitem(sys.modules, "this", raising=False)
+
+    result = executor._check_and_install_dependencies(
+        ["this", "json.decoder", "no-such-pkg-xyz.sub"], False, False
+    )
+
+    assert result["missing_packages"] == ["no-such-pkg-xyz.sub"]
+    assert "this" not in sys.modules